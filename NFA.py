@@ -1,70 +1,391 @@
 import simulationData as sd
+# the feature modules (lazyDFA, compiledDFA, batchMatcher, prefixCache, nfaStats, languageCheck) are
+# imported by the methods that use them, so importing NFA stays cheap (batchMatcher pulls in multiprocessing)
 class NFA:
     def __init__(self, alphabet: list[str], numStates: int,
                  startStates: list[int], finalStates: list[int],
-                 transitions: dict[tuple[int, str], list[int]]):
+                 transitions: dict[tuple[int, str], list[int]],
+                 traceLevel: int = sd.TRACE_STEPS):
 
         self.alphabet = alphabet
         self.numStates = numStates
         self.startStates = startStates
         self.finalStates = finalStates
         self.transitions = transitions
-        self.currentStates = set(startStates)
-        self.reset()
+        # how much processString/move record, see simulationData.TRACE_LEVELS
+        self.traceLevel = sd.checkTraceLevel(traceLevel)
+        self.finalSet = frozenset(finalStates)
         self.simulationData = sd.SimulationData()
+        self.buildSymbolTable()
+        # lambda closure of every state, computed once so move() never walks the '#' graph
+        self.closureTable = self.buildClosureTable()
+        self.buildSuccessorTables()
+        # dead/universal state analysis, computed the first time decide() needs it
+        self.liveStates: frozenset[int] | None = None
+        self.universalStates: frozenset[int] | None = None
+        # opt-in prefix trie used by processString at TRACE_NONE, see enablePrefixCache
+        self.prefixCache = None
+        self.currentStates = frozenset(startStates)
+        self.reset()
 
 
-    def lambdaClosure(self, states, currentStep=0):
-        closure = set(states)
-        stack = list(states)
+    # every symbol gets a dense id: the alphabet first, then '#' and any other symbol used by a transition.
+    # inputIds only holds the alphabet, those are the symbols an input string may contain
+    def buildSymbolTable(self):
+        self.symbols = list(dict.fromkeys(self.alphabet))
+        self.inputIds = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.symbolIds = dict(self.inputIds)
+        for symbol in ['#'] + [symbol for (_, symbol) in self.transitions]:
+            if symbol not in self.symbolIds:
+                self.symbolIds[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+        self.numSymbols = len(self.symbols)
 
-        while stack:
-            state = stack.pop()
-            key = (state, '#')
-            if key in self.transitions:
-                for nxt in self.transitions[key]:
-                    if nxt not in closure:
-                        prev_closure = closure.copy()
-                        closure.add(nxt)
-                        is_accepted = any(s in self.finalStates for s in closure)
-                        self.simulationData.recordLambdaMove(prev_closure, closure.copy(), is_accepted, currentStep)
+        # byte -> symbol id table for translating latin-1 strings with bytes.translate, 255 marks a bad byte
+        self.byteTable = None
+        if self.numSymbols < 255:
+            table = bytearray([255] * 256)
+            for symbol, symbolId in self.inputIds.items():
+                if len(symbol) == 1 and ord(symbol) < 256:
+                    table[ord(symbol)] = symbolId
+            self.byteTable = bytes(table)
+
+    # flat tables indexed by state * numSymbols + symbolId:
+    #   targetTable    the targets of the transition (used when the trace shows the lambda moves)
+    #   successorTable the targets with their lambda closure folded in
+    def buildSuccessorTables(self):
+        size = self.numStates * self.numSymbols
+        self.targetTable: list[tuple[int, ...]] = [()] * size
+        self.successorTable: list[frozenset[int]] = [frozenset()] * size
+        for (state, symbol), targets in self.transitions.items():
+            index = state * self.numSymbols + self.symbolIds[symbol]
+            self.targetTable[index] = tuple(targets)
+            self.successorTable[index] = frozenset().union(*[self.closureTable[t] for t in targets])
+
+    # translates a whole input string to symbol ids in one pass.
+    # strict (processString, the trace and the GUI) raises ValueError on a symbol that is not in the
+    # alphabet, otherwise it becomes -1, a symbol without transitions: the matchers (accepts, the lazy and
+    # compiled DFAs, the batch/stream/numpy backends) all just reject such a string
+    def translate(self, inputString, strict=True):
+        if self.byteTable is not None and isinstance(inputString, str):
+            try:
+                ids = inputString.encode('latin-1').translate(self.byteTable)
+            except UnicodeEncodeError:
+                ids = None
+            if ids is not None:
+                bad = ids.find(255)
+                if bad == -1:
+                    return ids
+                if strict:
+                    raise ValueError(f"Input string contains symbol '{inputString[bad]}' not in alphabet {self.alphabet}.")
+
+        ids = [self.inputIds.get(symbol, -1) for symbol in inputString]
+        if strict and -1 in ids:
+            bad = inputString[ids.index(-1)]
+            raise ValueError(f"Input string contains symbol '{bad}' not in alphabet {self.alphabet}.")
+        return ids
+
+    # computes the lambda closure of every state once.
+    # all states in one strongly connected component of the '#' graph share the same closure,
+    # and Tarjan finishes the components in reverse topological order, so the closure of a
+    # component is just its members plus the (already known) closures of the components it points to
+    def buildClosureTable(self) -> list[frozenset[int]]:
+        lambdaEdges = [[] for _ in range(self.numStates)]
+        for (state, symbol), targets in self.transitions.items():
+            if symbol == '#':
+                lambdaEdges[state].extend(targets)
+
+        closures = [None] * self.numStates
+        index = [-1] * self.numStates
+        low = [0] * self.numStates
+        onStack = [False] * self.numStates
+        stack = []
+        counter = 0
+
+        for root in range(self.numStates):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            onStack[root] = True
+            work = [(root, 0)]
+
+            while work:
+                state, edge = work[-1]
+                edges = lambdaEdges[state]
+                if edge < len(edges):
+                    work[-1] = (state, edge + 1)
+                    nxt = edges[edge]
+                    if index[nxt] == -1:
+                        index[nxt] = low[nxt] = counter
+                        counter += 1
                         stack.append(nxt)
+                        onStack[nxt] = True
+                        work.append((nxt, 0))
+                    elif onStack[nxt]:
+                        low[state] = min(low[state], index[nxt])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[state])
+                if low[state] != index[state]:
+                    continue
+
+                # state is the root of a component: pop its members and build the shared closure
+                members = []
+                while True:
+                    member = stack.pop()
+                    onStack[member] = False
+                    members.append(member)
+                    if member == state:
+                        break
+                closure = set(members)
+                for member in members:
+                    for nxt in lambdaEdges[member]:
+                        if closures[nxt] is not None:
+                            closure |= closures[nxt]
+                shared = frozenset(closure)
+                for member in members:
+                    closures[member] = shared
+
+        return closures
+
+    def lambdaClosure(self, states, currentStep=0):
+        closure = frozenset().union(*[self.closureTable[state] for state in states])
+        if self.traceLevel == sd.TRACE_FULL and len(closure) > len(states):
+            is_accepted = not self.finalSet.isdisjoint(closure)
+            self.simulationData.recordLambdaMove(frozenset(states), closure, is_accepted, currentStep)
         return closure
 
     
 
+    # lambda closure of the start states, without recording anything
+    def startConfiguration(self) -> frozenset[int]:
+        return frozenset().union(*[self.closureTable[state] for state in self.startStates])
+
+    # one step (symbol then lambda closure) from the given states,
+    # without touching currentStates or the simulation data. symbol is input, so it is looked up in the
+    # alphabet only: '#' (or a symbol that only labels transitions) leads nowhere, like in accepts()
+    def step(self, states, symbol: str) -> frozenset[int]:
+        return self.stepId(states, self.inputIds.get(symbol, -1))
+
+    # same as step with a symbol id, -1 is a symbol without any transition
+    def stepId(self, states, symbolId: int) -> frozenset[int]:
+        if symbolId < 0:
+            return frozenset()
+        table = self.successorTable
+        numSymbols = self.numSymbols
+        return frozenset().union(*[table[state * numSymbols + symbolId] for state in states])
+
+    # liveStates: the states that can still reach a final state.
+    # universalStates: states whose configurations accept every continuation. it is the greatest set U of
+    # states with a final state in their closure such that for every symbol the closure steps into U again
+    # (a safe under-approximation, deciding universality exactly would need a subset construction)
+    def analyzeStates(self):
+        if self.liveStates is not None:
+            return
+
+        backward = [[] for _ in range(self.numStates)]
+        for (state, _), targets in self.transitions.items():
+            for target in targets:
+                backward[target].append(state)
+        live = set(self.finalSet)
+        stack = list(self.finalSet)
+        while stack:
+            state = stack.pop()
+            for previous in backward[state]:
+                if previous not in live:
+                    live.add(previous)
+                    stack.append(previous)
+        self.liveStates = frozenset(live)
+
+        numSymbols = self.numSymbols
+        successors = [[frozenset().union(*[self.successorTable[member * numSymbols + symbolId]
+                                           for member in self.closureTable[state]])
+                       for symbolId in self.inputIds.values()] for state in range(self.numStates)]
+        universal = {state for state in range(self.numStates) if not self.finalSet.isdisjoint(self.closureTable[state])}
+        changed = True
+        while changed:
+            changed = False
+            for state in list(universal):
+                if any(universal.isdisjoint(targets) for targets in successors[state]):
+                    universal.discard(state)
+                    changed = True
+        self.universalStates = frozenset(universal)
+
+    # verdict for one string and the number of symbols read when it was decided: the run stops as soon as
+    # no live state is left (rejected) or a universal state is reached (accepted)
+    def decide(self, inputString) -> tuple[bool, int]:
+        self.analyzeStates()
+        live, universal = self.liveStates, self.universalStates
+        states = self.startConfiguration()
+        position = 0
+        symbolIds = self.translate(inputString, strict=False)
+        # a symbol outside the alphabet (-1) empties the configuration, even from a universal state
+        unknown = not isinstance(symbolIds, bytes) and -1 in symbolIds
+        for symbolId in symbolIds:
+            if live.isdisjoint(states):
+                return False, position
+            if not universal.isdisjoint(states):
+                return not unknown, position
+            states = self.stepId(states, symbolId)
+            position += 1
+        return not self.finalSet.isdisjoint(states), position
+
+    # verdict for one string from the start states, without touching currentStates or the trace
+    def accepts(self, inputString) -> bool:
+        return self.decide(inputString)[0]
+
+    # search mode: length of the shortest accepted prefix, or -1 when no prefix is accepted
+    def firstAcceptingPrefix(self, inputString) -> int:
+        self.analyzeStates()
+        states = self.startConfiguration()
+        if not self.finalSet.isdisjoint(states):
+            return 0
+        for position, symbolId in enumerate(self.translate(inputString, strict=False), 1):
+            states = self.stepId(states, symbolId)
+            if not self.finalSet.isdisjoint(states):
+                return position
+            if self.liveStates.isdisjoint(states):
+                return -1
+        return -1
+
+    # verdicts for many strings in input order, spread over a worker pool, see batchMatcher
+    def accepts_many(self, strings, workers=None, chunksize=1024, executor="process"):
+        import batchMatcher as batch
+        return batch.accepts_many(self, strings, workers, chunksize, executor)
+
+    # lazy subset construction over this automaton, see lazyDFA.LazyDFA
+    def lazyDFA(self, maxStates=1024, policy="flush"):
+        import lazyDFA as lazy
+        return lazy.LazyDFA(self, maxStates, policy)
+
+    # ahead of time subset construction + Hopcroft minimization, see compiledDFA.CompiledDFA
+    def compile(self):
+        import compiledDFA as compiled
+        return compiled.compileNFA(self)
+
+    # processString at TRACE_NONE resumes from the longest prefix it has already seen,
+    # see prefixCache.PrefixCache (maxNodes=0 turns it off again)
+    def enablePrefixCache(self, maxNodes=100000, maxDepth=256):
+        import prefixCache as cache
+        self.prefixCache = cache.PrefixCache(self, maxNodes, maxDepth) if maxNodes else None
+        return self.prefixCache
+
+    # language checks, see languageCheck. each returns a CheckResult (holds, counterexample, stats),
+    # maxStates bounds the search and gives holds=None when it is reached
+    def is_empty(self, maxStates=None):
+        import languageCheck as language
+        return language.isEmpty(self, maxStates)
+
+    def is_subset_of(self, other, maxStates=None):
+        import languageCheck as language
+        return language.isSubset(self, other, maxStates)
+
+    def is_equivalent(self, other, maxStates=None):
+        import languageCheck as language
+        return language.isEquivalent(self, other, maxStates)
+
+    # counts and times what the engine does, see nfaStats.instrument. the wrappers sit on this instance
+    # only, disableStats removes them and the engine is back to its plain methods
+    def enableStats(self, stats=None):
+        import nfaStats
+        return nfaStats.instrument(self, stats)
+
+    def disableStats(self):
+        import nfaStats
+        nfaStats.uninstrument(self)
+
     def reset(self):
         self.currentStates = self.lambdaClosure(set(self.startStates), 0)
 
     def move(self, symbol: str, currentStep=0):
-        nextStates = set()
+        self.moveId(self.symbolIds.get(symbol, -1), currentStep, symbol)
 
-        for state in self.currentStates:
-            key = (state, symbol)
-            if key in self.transitions:
-                for nxt in self.transitions[key]:
-                    nextStates.add(nxt)
+    # move with a symbol id, symbol is only needed for the trace when the id is -1
+    def moveId(self, symbolId: int, currentStep=0, symbol=None):
+        # nothing is recorded, so the closure can be folded straight into the step
+        if self.traceLevel == sd.TRACE_NONE:
+            self.currentStates = self.stepId(self.currentStates, symbolId)
+            return
 
+        if symbol is None:
+            symbol = self.symbols[symbolId]
+        nextStates = set()
 
-        #to Know If Accepteed Or Not Accepted
-        isAccep = any(state in self.finalStates for state in nextStates)
-        self.simulationData.recordMove(symbol, set(self.currentStates), nextStates.copy(), isAccep,currentStep)
+        if symbolId >= 0:
+            for state in self.currentStates:
+                nextStates.update(self.targetTable[state * self.numSymbols + symbolId])
 
+        fromStates = self.currentStates
         # After moving with actual symbol, apply lambda closure again
         self.currentStates = self.lambdaClosure(nextStates, currentStep)
 
+        #to Know If Accepteed Or Not Accepted
+        self.simulationData.recordMove(symbol, fromStates, self.currentStates, self.isAccepted(), currentStep)
+
     def isAccepted(self):
-        return any(state in self.finalStates for state in self.currentStates)
+        return not self.finalSet.isdisjoint(self.currentStates)
     
     def getCurrentStates(self) -> set[int]:
         return self.currentStates
+
+    def hasStates(self) -> bool:
+        return bool(self.currentStates)
     
     # # This is the main function it will receive the input string and proccess it
-    def processString(self, inputString):
-       step = 0
-         # Record initial state
-       self.simulationData.recordMove(None, set(), self.currentStates.copy(), self.isAccepted(), step)
-       for symbol in inputString:
-              step += 1
-              self.move(symbol, step)
-       return self.simulationData
+    # every call starts again from the start states with a fresh SimulationData,
+    # traceLevel overrides the automaton's level for this call only.
+    # cancelEvent (anything with is_set(), like threading.Event) is checked between symbols and
+    # onProgress(done, total) is called every progressEvery symbols, see runWatched
+    def processString(self, inputString, traceLevel=None, cancelEvent=None, onProgress=None, progressEvery=1000):
+       savedLevel = self.traceLevel
+       if traceLevel is not None:
+              self.traceLevel = sd.checkTraceLevel(traceLevel)
+       try:
+              # rejects symbols outside the alphabet before anything runs
+              symbolIds = self.translate(inputString)
+              self.simulationData = sd.SimulationData()
+              self.reset()
+              if self.traceLevel != sd.TRACE_NONE:
+                     # Record initial state
+                     self.simulationData.recordMove(None, frozenset(), self.getCurrentStates(), self.isAccepted(), 0)
+
+              if cancelEvent is not None or onProgress is not None:
+                     self.runWatched(symbolIds, cancelEvent, onProgress, progressEvery)
+              elif self.traceLevel == sd.TRACE_NONE and self.prefixCache is not None:
+                     self.currentStates = self.prefixCache.runIds(symbolIds)
+              elif self.traceLevel == sd.TRACE_NONE:
+                     for symbolId in symbolIds:
+                            self.moveId(symbolId)
+                            # no states left, the rest of the input can't change anything
+                            if not self.hasStates():
+                                   break
+              else:
+                     step = 0
+                     for symbolId in symbolIds:
+                            step += 1
+                            self.moveId(symbolId, step)
+              return self.simulationData
+       finally:
+              self.traceLevel = savedLevel
+
+    # the processString loop for runs someone is watching (like the GUI's worker thread),
+    # raises SimulationCancelled as soon as cancelEvent is set
+    def runWatched(self, symbolIds, cancelEvent, onProgress, progressEvery):
+        total = len(symbolIds)
+        for step, symbolId in enumerate(symbolIds, 1):
+            if cancelEvent is not None and cancelEvent.is_set():
+                raise SimulationCancelled(f"Simulation cancelled after {step - 1} of {total} symbols")
+            self.moveId(symbolId, step)
+            if onProgress is not None and step % progressEvery == 0:
+                onProgress(step, total)
+        if onProgress is not None:
+            onProgress(total, total)
+
+
+class SimulationCancelled(Exception):
+    pass
@@ -0,0 +1,133 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+
+import NFA as nfa
+import simulationData as sd
+
+EXECUTORS = ("process", "thread")
+
+# the matcher of the current worker, built once from the spec shipped by the pool initializer
+workerMatcher = None
+# thread pools share the module, so every thread keeps its own matcher
+threadMatchers = threading.local()
+
+
+# everything needed to rebuild the automaton in another process. an automaton that came through
+# nfaCache is shipped as the path of its cache file, so the workers map it instead of rebuilding it
+def automatonSpec(automaton) -> tuple:
+    cachePath = getattr(automaton, "cachePath", None)
+    if cachePath is not None:
+        return (cachePath,)
+    return (automaton.alphabet, automaton.numStates, automaton.startStates,
+            automaton.finalStates, automaton.transitions)
+
+
+# engine is NFA or BitsetNFA
+def buildAutomaton(spec, engine=nfa.NFA):
+    if len(spec) == 1:
+        import nfaCache
+        return nfaCache.load(spec[0], sd.TRACE_NONE, engine)[0]
+    return engine(*spec, traceLevel=sd.TRACE_NONE)
+
+
+def buildMatcher(spec, maxStates: int):
+    return buildAutomaton(spec).lazyDFA(maxStates)
+
+
+def initWorker(spec, maxStates: int):
+    global workerMatcher
+    workerMatcher = buildMatcher(spec, maxStates)
+
+
+def matchChunk(start: int, strings: list[str]) -> tuple[int, list[bool]]:
+    return start, [workerMatcher.accepts(s) for s in strings]
+
+
+def initThread(spec, maxStates: int):
+    threadMatchers.matcher = buildMatcher(spec, maxStates)
+
+
+def matchChunkInThread(start: int, strings: list[str]) -> tuple[int, list[bool]]:
+    return start, [threadMatchers.matcher.accepts(s) for s in strings]
+
+
+def chunked(strings, chunksize: int):
+    iterator = iter(strings)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+# the number of workers to use, None means one per CPU. both are checked whatever the pool, so a call
+# never gives a different answer depending on the worker count
+def checkArguments(workers, chunksize: int) -> int:
+    if workers is not None and workers < 1:
+        raise ValueError("workers should be at least 1")
+    if chunksize < 1:
+        raise ValueError("chunksize should be at least 1")
+    return workers or os.cpu_count() or 1
+
+
+def makeExecutor(automaton, workers: int, executor: str, maxStates: int):
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+    initargs = (automatonSpec(automaton), maxStates)
+    if executor == "process":
+        return ProcessPoolExecutor(workers, initializer=initWorker, initargs=initargs), matchChunk
+    return ThreadPoolExecutor(workers, initializer=initThread, initargs=initargs), matchChunkInThread
+
+
+# yields (index, verdict) in the order the chunks finish, at most 2 * workers chunks are in flight
+# so the input can be a generator of any length
+def iter_accepts_unordered(automaton, strings, workers=None, chunksize=1024, executor="process", maxStates=1024):
+    workers = checkArguments(workers, chunksize)
+    if workers == 1:
+        matcher = buildMatcher(automatonSpec(automaton), maxStates)
+        for index, inputString in enumerate(strings):
+            yield index, matcher.accepts(inputString)
+        return
+
+    pool, task = makeExecutor(automaton, workers, executor, maxStates)
+    with pool:
+        pending = set()
+        for start, chunk in chunked(strings, chunksize):
+            pending.add(pool.submit(task, start, chunk))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, verdicts = future.result()
+                    yield from enumerate(verdicts, start)
+        for future in pending:
+            start, verdicts = future.result()
+            yield from enumerate(verdicts, start)
+
+
+# yields the verdicts in input order, with the same bounded number of chunks in flight
+def iter_accepts(automaton, strings, workers=None, chunksize=1024, executor="process", maxStates=1024):
+    workers = checkArguments(workers, chunksize)
+    if workers == 1:
+        matcher = buildMatcher(automatonSpec(automaton), maxStates)
+        for inputString in strings:
+            yield matcher.accepts(inputString)
+        return
+
+    pool, task = makeExecutor(automaton, workers, executor, maxStates)
+    with pool:
+        pending = deque()
+        for start, chunk in chunked(strings, chunksize):
+            pending.append(pool.submit(task, start, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()[1]
+        while pending:
+            yield from pending.popleft().result()[1]
+
+
+def accepts_many(automaton, strings, workers=None, chunksize=1024, executor="process", maxStates=1024) -> list[bool]:
+    return list(iter_accepts(automaton, strings, workers, chunksize, executor, maxStates))
@@ -0,0 +1,125 @@
+import NFA as nfa
+import simulationData as sd
+
+
+def statesToMask(states) -> int:
+    mask = 0
+    for state in states:
+        mask |= 1 << state
+    return mask
+
+
+# one empty slice table per byte of a mask (8 states) for a row of masks, see orRows
+def sliceTables(numStates: int) -> list[list[int | None]]:
+    return [[0] + [None] * 255 for _ in range((numStates + 7) // 8)]
+
+
+# the OR of rows[state] over the states of mask, one byte of the mask at a time: tables[k][value] is the OR
+# for the states 8k..8k+7 set in value, filled the first time that value shows up. a step is numStates / 8
+# lookups instead of a loop over every active state
+def orRows(rows, tables, mask: int) -> int:
+    result = 0
+    for k, value in enumerate(mask.to_bytes(len(tables), "little")):
+        if value:
+            entry = tables[k][value]
+            if entry is None:
+                entry = 0
+                base = k * 8
+                bits = value
+                while bits:
+                    low = bits & -bits
+                    entry |= rows[base + low.bit_length() - 1]
+                    bits ^= low
+                tables[k][value] = entry
+            result |= entry
+    return result
+
+
+def maskToStates(mask: int) -> frozenset[int]:
+    states = []
+    while mask:
+        low = mask & -mask
+        states.append(low.bit_length() - 1)
+        mask ^= low
+    return frozenset(states)
+
+
+# same automaton and public API as NFA, but every set of states is an int bitmask (bit i = state i):
+# a step ORs the precomputed successor masks of the active states (slice by slice, see orRows) and
+# acceptance is a single AND
+class BitsetNFA(nfa.NFA):
+
+    # the masks mirror the flat successor tables, kept as one row per symbol id (row[state] = mask):
+    # targetMasks are the raw targets (only used for the trace), successorMasks have the closure folded in.
+    # every row has its slice tables next to it, filled while the automaton runs
+    def buildSuccessorTables(self):
+        super().buildSuccessorTables()
+        self.closureMasks = [statesToMask(closure) for closure in self.closureTable]
+        self.finalMask = statesToMask(self.finalStates)
+
+        numSymbols = self.numSymbols
+        self.targetMasks = [[statesToMask(self.targetTable[state * numSymbols + symbolId])
+                             for state in range(self.numStates)] for symbolId in range(numSymbols)]
+        self.successorMasks = [[statesToMask(self.successorTable[state * numSymbols + symbolId])
+                                for state in range(self.numStates)] for symbolId in range(numSymbols)]
+        self.closureSlices = sliceTables(self.numStates)
+        self.targetSlices = [sliceTables(self.numStates) for _ in range(numSymbols)]
+        self.successorSlices = [sliceTables(self.numStates) for _ in range(numSymbols)]
+
+    @property
+    def currentStates(self) -> frozenset[int]:
+        return maskToStates(self.currentMask)
+
+    @currentStates.setter
+    def currentStates(self, states):
+        self.currentMask = statesToMask(states)
+
+    def closureMask(self, mask: int) -> int:
+        return mask | orRows(self.closureMasks, self.closureSlices, mask)
+
+    def lambdaClosure(self, states, currentStep=0):
+        return maskToStates(self.closureMaskRecorded(statesToMask(states), currentStep))
+
+    def closureMaskRecorded(self, mask: int, currentStep=0) -> int:
+        closure = self.closureMask(mask)
+        if self.traceLevel == sd.TRACE_FULL and closure != mask:
+            self.simulationData.recordLambdaMove(maskToStates(mask), maskToStates(closure),
+                                                 bool(closure & self.finalMask), currentStep)
+        return closure
+
+    def reset(self):
+        self.currentMask = self.closureMaskRecorded(statesToMask(self.startStates), 0)
+
+    def moveId(self, symbolId: int, currentStep=0, symbol=None):
+        if self.traceLevel == sd.TRACE_NONE:
+            self.currentMask = self.stepMaskId(self.currentMask, symbolId)
+            return
+
+        if symbol is None:
+            symbol = self.symbols[symbolId]
+        current = self.currentMask
+        nextMask = 0
+        if symbolId >= 0:
+            nextMask = orRows(self.targetMasks[symbolId], self.targetSlices[symbolId], current)
+
+        self.currentMask = self.closureMaskRecorded(nextMask, currentStep)
+        self.simulationData.recordMove(symbol, maskToStates(current), maskToStates(self.currentMask),
+                                       bool(self.currentMask & self.finalMask), currentStep)
+
+    # one step without touching the current configuration or the trace
+    def stepMask(self, mask: int, symbol: str) -> int:
+        return self.stepMaskId(mask, self.inputIds.get(symbol, -1))
+
+    def stepMaskId(self, mask: int, symbolId: int) -> int:
+        if symbolId < 0:
+            return 0
+        return orRows(self.successorMasks[symbolId], self.successorSlices[symbolId], mask)
+
+    def isAccepted(self):
+        return bool(self.currentMask & self.finalMask)
+
+    def getCurrentStates(self) -> set[int]:
+        return maskToStates(self.currentMask)
+
+    def hasStates(self) -> bool:
+        return self.currentMask != 0
@@ -0,0 +1,141 @@
+import copy
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+
+import NFA as nfa
+import nfaStats
+import simulationData as sd
+
+
+# a trace for very long runs that only keeps the configuration every `interval` symbols.
+# it reads like SimulationData.getResults() (same entries, same order), but an entry is rebuilt on
+# demand by replaying at most `interval` symbols from the nearest checkpoint with NFA.move, so memory
+# is O(n / interval) plus the translated input. the last replayed block is kept, so walking through
+# neighbouring entries (Prev/Next, scrolling the log) only replays once per block
+class CheckpointTrace(Sequence):
+    def __init__(self, automaton, inputString, interval=1024, traceLevel=sd.TRACE_FULL,
+                 cancelEvent=None, onProgress=None):
+        if interval < 1:
+            raise ValueError("interval should be at least 1")
+        if traceLevel == sd.TRACE_NONE:
+            raise ValueError("A checkpoint trace needs TRACE_STEPS or TRACE_FULL")
+
+        # replays run on a copy, so they never disturb the automaton (or another run on it)
+        self.engine = copy.copy(automaton)
+        # the copy would share the instrumentation wrappers, which still point at the original
+        nfaStats.uninstrument(self.engine)
+        self.engine.traceLevel = sd.checkTraceLevel(traceLevel)
+        self.interval = interval
+        self.symbolIds = automaton.translate(inputString)
+        self.numSteps = len(self.symbolIds)
+
+        # checkpoints[c] is the configuration after step c * interval,
+        # entryOffsets[c] the index of the first entry of block c (steps c * interval + 1 ...)
+        self.checkpoints: list[frozenset[int]] = []
+        self.entryOffsets = array('q')
+        self.cachedBlock = -1
+        self.cachedData: sd.SimulationData | None = None
+
+        entries = 0
+        for block in range(self.numBlocks()):
+            if cancelEvent is not None and cancelEvent.is_set():
+                raise nfa.SimulationCancelled(f"Trace cancelled after {block * interval} of {self.numSteps} symbols")
+            self.entryOffsets.append(entries)
+            data = self.replay(block)
+            entries += len(data)
+            if onProgress is not None:
+                onProgress(min((block + 1) * interval, self.numSteps), self.numSteps)
+        self.numEntries = entries
+        self.finalConfiguration = self.engine.getCurrentStates()
+        self.accepted = self.engine.isAccepted()
+
+    def numBlocks(self) -> int:
+        # block 0 also holds step 0, so an empty input still has one block
+        return max((self.numSteps + self.interval - 1) // self.interval, 1)
+
+    # runs block c from its checkpoint and returns its entries, recording the next checkpoint on the first pass
+    def replay(self, block: int) -> sd.SimulationData:
+        engine = self.engine
+        engine.simulationData = sd.SimulationData()
+        if block == 0:
+            engine.reset()
+            engine.simulationData.recordMove(None, frozenset(), engine.getCurrentStates(), engine.isAccepted(), 0)
+            self.checkpoints[:1] = [engine.getCurrentStates()]
+        else:
+            engine.currentStates = self.checkpoints[block]
+
+        first = block * self.interval
+        for offset, symbolId in enumerate(self.symbolIds[first:first + self.interval], first + 1):
+            engine.moveId(symbolId, offset)
+
+        if block + 1 == len(self.checkpoints):
+            self.checkpoints.append(engine.getCurrentStates())
+        self.cachedBlock = block
+        self.cachedData = engine.simulationData
+        return engine.simulationData
+
+    def blockData(self, block: int) -> sd.SimulationData:
+        if block != self.cachedBlock:
+            self.replay(block)
+        return self.cachedData
+
+    def __len__(self):
+        return self.numEntries
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trace index out of range")
+        block = bisect_right(self.entryOffsets, index) - 1
+        return self.blockData(block).getEntry(index - self.entryOffsets[block])
+
+    # same as SimulationData.getResults, the trace already is the sequence of entries
+    def getResults(self):
+        return self
+
+    # jump to step N: the index of the entry recording symbol N (step 0 = the start configuration),
+    # the lambda moves of that step are the entries right before it
+    def entryIndexOfStep(self, step: int) -> int:
+        if not 0 <= step <= self.numSteps:
+            raise IndexError(f"step {step} out of range [0, {self.numSteps}]")
+        block = 0 if step == 0 else (step - 1) // self.interval
+        data = self.blockData(block)
+        for index in range(len(data)):
+            if data.steps[index] == step and not data.flags[index] & sd.LAMBDA_FLAG:
+                return self.entryOffsets[block] + index
+        raise IndexError(f"step {step} is not in the trace")
+
+    # index of the first entry of a step (its first lambda move, or the move itself), len(self) past the
+    # last step. the entries of a step are all in its block, so this replays one block at most
+    def firstEntryOfStep(self, step: int) -> int:
+        if step > self.numSteps:
+            return self.numEntries
+        if step < 0:
+            return 0
+        block = 0 if step == 0 else (step - 1) // self.interval
+        data = self.blockData(block)
+        for index in range(len(data)):
+            if data.steps[index] >= step:
+                return self.entryOffsets[block] + index
+        raise IndexError(f"step {step} is not in the trace")
+
+    # every entry of one step: its lambda moves and then the move itself
+    def getStep(self, step: int) -> list[dict]:
+        end = self.entryIndexOfStep(step)
+        start = end
+        while start > 0 and next(iter(self[start - 1])) == step:
+            start -= 1
+        return self[start:end + 1]
+
+    # the configuration right after the given step, straight from a checkpoint when there is one
+    def configurationAt(self, step: int) -> frozenset[int]:
+        if step % self.interval == 0 and step // self.interval < len(self.checkpoints):
+            return self.checkpoints[step // self.interval]
+        return self[self.entryIndexOfStep(step)][step]["toStates"]
+
+    def isAccepted(self) -> bool:
+        return self.accepted
@@ -0,0 +1,144 @@
+from array import array
+
+
+# a complete minimal DFA in a dense table: table[state * numSymbols + symbolId] is the next state.
+# symbols outside the alphabet all go to the dead state (or stay undefined if there is none,
+# in which case they go to state -1 which rejects)
+class CompiledDFA:
+    def __init__(self, alphabet: list[str], table, accepting, startState: int,
+                 subsetStates: int, minimizedStates: int):
+        self.alphabet = alphabet
+        self.symbolIds = {symbol: i for i, symbol in enumerate(alphabet)}
+        self.numSymbols = len(alphabet)
+        self.table = table
+        self.accepting = accepting
+        self.startState = startState
+        # state counts before and after minimization
+        self.subsetStates = subsetStates
+        self.minimizedStates = minimizedStates
+        self.deadState = self.findDeadState()
+
+    def findDeadState(self) -> int:
+        for state in range(self.minimizedStates):
+            if self.accepting[state]:
+                continue
+            base = state * self.numSymbols
+            if all(self.table[base + i] == state for i in range(self.numSymbols)):
+                return state
+        return -1
+
+    # returns the DFA state reached after the whole string, or -1 if a symbol is not in the alphabet
+    def run(self, inputString) -> int:
+        table = self.table
+        symbolIds = self.symbolIds
+        numSymbols = self.numSymbols
+        state = self.startState
+        for symbol in inputString:
+            symbolId = symbolIds.get(symbol)
+            if symbolId is None:
+                return self.deadState
+            state = table[state * numSymbols + symbolId]
+        return state
+
+    def accepts(self, inputString) -> bool:
+        state = self.run(inputString)
+        return state >= 0 and bool(self.accepting[state])
+
+    def getStats(self) -> dict[str, int]:
+        return {"subsetStates": self.subsetStates, "minimizedStates": self.minimizedStates}
+
+
+# full subset construction from the start configuration over the alphabet.
+# returns the configurations and a transition list indexed by [state][symbolId]
+def subsetConstruction(automaton, alphabet: list[str]):
+    start = automaton.startConfiguration()
+    ids = {start: 0}
+    configurations = [start]
+    transitions = []
+    i = 0
+    while i < len(configurations):
+        row = []
+        for symbol in alphabet:
+            nxt = automaton.step(configurations[i], symbol)
+            if nxt not in ids:
+                ids[nxt] = len(configurations)
+                configurations.append(nxt)
+            row.append(ids[nxt])
+        transitions.append(row)
+        i += 1
+    return configurations, transitions
+
+
+# Hopcroft's partition refinement, returns the block of every state
+def hopcroft(numStates: int, numSymbols: int, transitions, accepting) -> list[int]:
+    # inverse transitions: inverse[symbol][target] = sources
+    inverse = [[[] for _ in range(numStates)] for _ in range(numSymbols)]
+    for source in range(numStates):
+        for symbolId, target in enumerate(transitions[source]):
+            inverse[symbolId][target].append(source)
+
+    finals = {s for s in range(numStates) if accepting[s]}
+    others = set(range(numStates)) - finals
+    partition = [block for block in (finals, others) if block]
+    blockOf = [0] * numStates
+    for index, block in enumerate(partition):
+        for state in block:
+            blockOf[state] = index
+
+    # the smaller of the two initial blocks is enough as a splitter
+    waiting = {min(range(len(partition)), key=lambda b: len(partition[b]))} if len(partition) == 2 else set()
+    while waiting:
+        splitter = partition[waiting.pop()]
+        for symbolId in range(numSymbols):
+            predecessors = set()
+            for target in splitter:
+                predecessors.update(inverse[symbolId][target])
+            if not predecessors:
+                continue
+
+            touched: dict[int, set[int]] = {}
+            for state in predecessors:
+                touched.setdefault(blockOf[state], set()).add(state)
+
+            for index, inside in touched.items():
+                block = partition[index]
+                if len(inside) == len(block):
+                    continue
+                outside = block - inside
+                partition[index] = inside
+                partition.append(outside)
+                newIndex = len(partition) - 1
+                for state in outside:
+                    blockOf[state] = newIndex
+                if index in waiting:
+                    waiting.add(newIndex)
+                else:
+                    waiting.add(index if len(inside) <= len(outside) else newIndex)
+    return blockOf
+
+
+def compileNFA(automaton) -> CompiledDFA:
+    # '#' is only a column when the user put it in the alphabet, like NFA.move would accept it
+    alphabet = list(dict.fromkeys(automaton.alphabet))
+    configurations, transitions = subsetConstruction(automaton, alphabet)
+    numStates = len(configurations)
+    accepting = [not automaton.finalSet.isdisjoint(c) for c in configurations]
+
+    blockOf = hopcroft(numStates, len(alphabet), transitions, accepting)
+
+    # renumber the blocks in discovery order so the start state is 0
+    renumber: dict[int, int] = {}
+    for state in range(numStates):
+        renumber.setdefault(blockOf[state], len(renumber))
+    minimizedStates = len(renumber)
+
+    table = array('i', [0] * (minimizedStates * len(alphabet)))
+    acceptingTable = array('b', [0] * minimizedStates)
+    for state in range(numStates):
+        block = renumber[blockOf[state]]
+        acceptingTable[block] = accepting[state]
+        base = block * len(alphabet)
+        for symbolId, target in enumerate(transitions[state]):
+            table[base + symbolId] = renumber[blockOf[target]]
+
+    return CompiledDFA(alphabet, table, acceptingTable, renumber[blockOf[0]], numStates, minimizedStates)
@@ -0,0 +1,229 @@
+import math
+import tkinter as tk
+
+from checkpointTrace import CheckpointTrace
+
+LEVEL_HEIGHT = 80
+NODE_RADIUS = 20
+MIN_SPACING = 80
+TOP_MARGIN = 50
+
+# colors
+COLOR_PAST_FILL = '#ffffff'
+COLOR_PAST_OUTLINE = '#000000'
+COLOR_CURRENT_FILL = '#ffffcc'
+COLOR_CURRENT_OUTLINE = '#000000'
+COLOR_FINAL_OUTLINE = '#ff0000'
+COLOR_TEXT = '#000000'
+COLOR_EDGE = '#000000'
+
+
+def stepOf(entry: dict) -> int:
+    return next(iter(entry))
+
+
+# draws the derivation tree of a run incrementally.
+# every trace entry owns the canvas items it introduced (nodes, edges, symbol label), so moving
+# from entry i to entry j only adds or deletes the items of the entries in between and recolours
+# the previously active and the newly active nodes.
+# only the levels inside the visible part of the canvas are drawn, refreshVisible() draws the rest
+# when the user scrolls. a level is laid out from all of its entries the first time it is needed,
+# so the positions never move while navigating
+class DerivationTreeRenderer:
+    def __init__(self, canvas: tk.Canvas, automaton, results):
+        self.canvas = canvas
+        self.nfa = automaton
+        self.results = results
+
+        self.viewWidth = canvas.winfo_width()
+        if self.viewWidth <= 1:
+            self.viewWidth = 600
+        self.scrollWidth = self.viewWidth
+
+        # level -> (first entry index, end entry index, positions {state: (x, y)}, introducedBy {state: entry index})
+        self.levels: dict[int, tuple[int, int, dict, dict]] = {}
+        # entry index -> (canvas items, keys of the nodes/edges/labels it owns)
+        self.entryItems: dict[int, tuple[list[int], list[tuple]]] = {}
+        # every node/edge/label on the canvas, used to avoid drawing duplicates
+        self.drawnKeys: set[tuple] = set()
+        # (level, state) -> (oval, text), used to recolour
+        self.nodeItems: dict[tuple[int, int], tuple[int, int]] = {}
+
+        self.currentIndex = -1
+        self.activeLevel = -1
+        self.activeStates = frozenset()
+
+    # first entry index whose step number is >= level (entries are sorted by step number).
+    # a checkpoint trace knows which block holds the step, a binary search would replay a block per probe
+    def firstEntryOfLevel(self, level: int) -> int:
+        if isinstance(self.results, CheckpointTrace):
+            return self.results.firstEntryOfStep(level)
+        low, high = 0, len(self.results)
+        while low < high:
+            middle = (low + high) // 2
+            if stepOf(self.results[middle]) < level:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def levelLayout(self, level: int):
+        if level in self.levels:
+            return self.levels[level]
+
+        first = self.firstEntryOfLevel(level)
+        end = self.firstEntryOfLevel(level + 1)
+        introducedBy = {}
+        for idx in range(first, end):
+            data = self.results[idx][level]
+            for state in data['fromStates']:
+                introducedBy.setdefault(state, idx)
+            for state in data['toStates']:
+                introducedBy.setdefault(state, idx)
+
+        sortedStates = sorted(introducedBy)
+        width = max(self.viewWidth, (len(sortedStates) + 1) * MIN_SPACING)
+        self.scrollWidth = max(self.scrollWidth, width)
+        spacing = width / (len(sortedStates) + 1)
+        y = TOP_MARGIN + level * LEVEL_HEIGHT
+        positions = {state: ((i + 1) * spacing, y) for i, state in enumerate(sortedStates)}
+
+        self.levels[level] = (first, end, positions, introducedBy)
+        return self.levels[level]
+
+    def nodeStyle(self, level: int, state: int):
+        is_current = (level == self.activeLevel and state in self.activeStates)
+        is_final = (state in self.nfa.finalSet)
+        fill = COLOR_CURRENT_FILL if is_current else COLOR_PAST_FILL
+        outline = COLOR_FINAL_OUTLINE if is_final else (COLOR_CURRENT_OUTLINE if is_current else COLOR_PAST_OUTLINE)
+        width = 3 if is_final else (2 if is_current else 1)
+        return fill, outline, width
+
+    def drawEntry(self, idx: int):
+        entry = self.results[idx]
+        level = stepOf(entry)
+        data = entry[level]
+        _, _, positions, introducedBy = self.levelLayout(level)
+        items = []
+        keys = []
+
+        symbol = data.get('symbol', '#')
+        if symbol is None: symbol = "#"
+
+        if symbol != '#' and idx > 0 and ('label', level, symbol) not in self.drawnKeys:
+            y_level = TOP_MARGIN + level * LEVEL_HEIGHT
+            items.append(self.canvas.create_text(30, y_level - LEVEL_HEIGHT/2, text=f"'{symbol}'",
+                                                 font=('Segoe UI', 12, 'bold'), fill=COLOR_TEXT))
+            keys.append(('label', level, symbol))
+
+        # the nodes this entry brings into its level
+        for state, owner in introducedBy.items():
+            if owner != idx:
+                continue
+            x, y = positions[state]
+            fill, outline, width = self.nodeStyle(level, state)
+            oval = self.canvas.create_oval(x-NODE_RADIUS, y-NODE_RADIUS, x+NODE_RADIUS, y+NODE_RADIUS,
+                                           fill=fill, outline=outline, width=width)
+            text = self.canvas.create_text(x, y, text=str(state), font=('Segoe UI', 10, 'bold'), fill=COLOR_TEXT)
+            self.nodeItems[(level, state)] = (oval, text)
+            items.extend((oval, text))
+            keys.append((level, state))
+
+        # a lambda entry covers the whole closure of its step, so its edges start anywhere in it
+        to_states = data['toStates']
+        if symbol == '#':
+            source_step, sources, source_positions = level, to_states, positions
+        else:
+            source_step, sources = level - 1, data['fromStates']
+            source_positions = self.levelLayout(level - 1)[2] if level > 0 else {}
+
+        for u in sources:
+            if u not in source_positions: continue
+            for v in self.nfa.transitions.get((u, symbol), ()):
+                if v not in to_states or v not in positions:
+                    continue
+                edge_key = (source_step, u, level, v, symbol)
+                if edge_key in self.drawnKeys or edge_key in keys:
+                    continue
+
+                x1, y1 = source_positions[u]
+                x2, y2 = positions[v]
+                if symbol == '#':
+                    if x1 < x2:
+                        items.append(self.canvas.create_line(x1+NODE_RADIUS, y1, x2-NODE_RADIUS, y2,
+                                                             arrow=tk.LAST, fill=COLOR_EDGE, width=1.5, dash=(4, 2)))
+                    elif x1 > x2:
+                        items.append(self.canvas.create_line(x1-NODE_RADIUS, y1, x2+NODE_RADIUS, y2,
+                                                             arrow=tk.LAST, fill=COLOR_EDGE, width=1.5, dash=(4, 2)))
+                    else:
+                        continue
+                else:
+                    items.append(self.canvas.create_line(x1, y1+NODE_RADIUS, x2, y2-NODE_RADIUS,
+                                                         arrow=tk.LAST, fill=COLOR_EDGE, width=1.5, smooth=True))
+                keys.append(edge_key)
+
+        self.drawnKeys.update(keys)
+        self.entryItems[idx] = (items, keys)
+
+    def undoEntry(self, idx: int):
+        if idx not in self.entryItems:
+            return
+        items, keys = self.entryItems.pop(idx)
+        for item in items:
+            self.canvas.delete(item)
+        for key in keys:
+            self.drawnKeys.discard(key)
+            if len(key) == 2:
+                self.nodeItems.pop(key, None)
+
+    def recolour(self, level: int, states):
+        for state in states:
+            node = self.nodeItems.get((level, state))
+            if node is not None:
+                fill, outline, width = self.nodeStyle(level, state)
+                self.canvas.itemconfigure(node[0], fill=fill, outline=outline, width=width)
+
+    def setActive(self):
+        previousLevel, previousStates = self.activeLevel, self.activeStates
+        if self.currentIndex >= 0:
+            entry = self.results[self.currentIndex]
+            self.activeLevel = stepOf(entry)
+            self.activeStates = entry[self.activeLevel]['toStates']
+        else:
+            self.activeLevel, self.activeStates = -1, frozenset()
+
+        if previousLevel == self.activeLevel:
+            self.recolour(previousLevel, previousStates ^ self.activeStates)
+        else:
+            self.recolour(previousLevel, previousStates)
+            self.recolour(self.activeLevel, self.activeStates)
+
+    def visibleLevels(self) -> range:
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        if height <= 1: height = 600
+        bottom = self.canvas.canvasy(height)
+        # one extra level on each side, so edges coming from the level above are there too
+        first = max(0, math.floor((top - TOP_MARGIN) / LEVEL_HEIGHT) - 1)
+        last = math.ceil((bottom - TOP_MARGIN) / LEVEL_HEIGHT) + 1
+        return range(first, min(last, self.activeLevel) + 1)
+
+    # draws the revealed entries of the visible levels that are not on the canvas yet
+    def refreshVisible(self):
+        if self.currentIndex < 0:
+            return
+        for level in self.visibleLevels():
+            first, end, _, _ = self.levelLayout(level)
+            for idx in range(first, min(end, self.currentIndex + 1)):
+                if idx not in self.entryItems:
+                    self.drawEntry(idx)
+
+    # shows the tree up to (and including) the given entry
+    def showUpTo(self, index: int):
+        for idx in range(self.currentIndex, index, -1):
+            self.undoEntry(idx)
+        self.currentIndex = index
+        self.setActive()
+        self.refreshVisible()
+        height = TOP_MARGIN + max(self.activeLevel, 0) * LEVEL_HEIGHT + LEVEL_HEIGHT
+        self.canvas.configure(scrollregion=(0, 0, self.scrollWidth, height))
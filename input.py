@@ -1,50 +1,44 @@
 # input.py
+import queue
+import threading
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
+
+from NFA import NFA, SimulationCancelled
+from derivationTree import DerivationTreeRenderer
+from virtualLog import VirtualLog
+from checkpointTrace import CheckpointTrace
+import simulationData as sd
+# the parsers live in nfaSpec so the command line tool can use them without tkinter
+import nfaSpec
+from nfaSpec import parse_alphabet, parse_int_list, parse_transitions
+
+# inputs longer than this get a checkpointed trace instead of a full one
+CHECKPOINT_THRESHOLD = 20000
+CHECKPOINT_INTERVAL = 1024
+# the slider only jumps once it rests this long, dragging it passes through every index on the way
+SLIDER_DELAY_MS = 150
+
+
+# the trace holds frozensets, the log shows them like plain sets
+def format_states(states) -> str:
+    return "{" + ", ".join(str(state) for state in sorted(states)) + "}"
+
+
+# one line of the simulation log, built only when the line is on screen
+def format_log_line(step_dict) -> str:
+    step = list(step_dict.keys())[0]
+    data = step_dict[step]
+    symbol_part = f"symbol = {data['symbol']}, " if 'symbol' in data else ""
+    return (
+        f"Step {step}: "
+        f"{symbol_part}"
+        f"from = {format_states(data['fromStates'])}, "
+        f"to = {format_states(data['toStates'])}, "
+        f"accepted = {data['isAccepted']}"
+    )
 
-from NFA import NFA
 
-
-def parse_alphabet(s: str) -> list[str]:
-    return [x.strip() for x in s.split(',') if x.strip() != ""]
-
-
-def parse_int_list(s: str) -> list[int]:
-    if not s.strip():
-        return []
-    return [int(x.strip()) for x in s.split(',') if x.strip() != ""]
-
-
-def parse_transitions(s: str) -> dict[tuple[int, str], list[int]]:
-    """
-    Line should be:
-    from_state,symbol,to1,to2,...
-    examble:
-    0,a,0,1
-    1,b,2
-    0,#,2
-    """
-    transitions: dict[tuple[int, str], list[int]] = {}
-    lines = s.strip().splitlines()
-
-    for line in lines:
-        if not line.strip():
-            continue
-        parts = [p.strip() for p in line.split(',')]
-        if len(parts) < 3:
-            raise ValueError("Each line should be: from_state,symbol,to1,to2,...")
-
-        from_state = int(parts[0])
-        symbol = parts[1]
-        to_states = [int(p) for p in parts[2:]]
-
-        key = (from_state, symbol)
-        if key in transitions:
-            transitions[key].extend(to_states)
-        else:
-            transitions[key] = to_states
-
-    return transitions
 class NFAInputGUI:
     def __init__(self, root: tk.Tk):
         self.root = root
@@ -76,7 +70,7 @@ class NFAInputGUI:
 
         self.canvas = tk.Canvas(self.canvas_frame, width=600, height=600, bg='white', 
                                 highlightthickness=1, highlightbackground="#000000",
-                                yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set)
+                                yscrollcommand=self.on_canvas_yscroll, xscrollcommand=self.h_scroll.set)
         
         self.v_scroll.config(command=self.canvas.yview)
         self.h_scroll.config(command=self.canvas.xview)
@@ -148,151 +142,52 @@ class NFAInputGUI:
         self.next_button = tk.Button(self.nav_frame, text="Next >", command=self.next_step, state=tk.DISABLED, width=8, highlightbackground=self.bg_color)
         self.next_button.pack(side=tk.LEFT, padx=5)
 
+        row += 1
+
+        # progress of a running simulation
+        self.progress_frame = tk.Frame(self.left_frame, bg=self.bg_color)
+        self.progress_frame.grid(row=row, column=0, columnspan=2, sticky="ew")
+        self.progress_bar = ttk.Progressbar(self.progress_frame, orient=tk.HORIZONTAL, mode="determinate", maximum=1)
+        self.progress_bar.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        self.cancel_button = tk.Button(self.progress_frame, text="Cancel", command=self.cancel_simulation, state=tk.DISABLED, width=8, highlightbackground=self.bg_color)
+        self.cancel_button.pack(side=tk.LEFT)
+
+        row += 1
+
+        # jump to any entry of the run
+        self.step_slider = tk.Scale(self.left_frame, from_=0, to=0, orient=tk.HORIZONTAL, label="Step", command=self.on_step_slider, state=tk.DISABLED, bg=self.bg_color, highlightthickness=0)
+        self.step_slider.grid(row=row, column=0, columnspan=2, sticky="ew")
+
         tk.Label(self.left_frame, text="Simulation Log:", bg=self.bg_color, fg=self.text_color, font=self.font_header).grid(row=row+1, column=0, sticky="w", pady=(15, 5))
         row += 2
 
-        self.output_text = tk.Text(self.left_frame, width=60, height=12, font=("Consolas", 11), relief=tk.FLAT, highlightthickness=1, highlightbackground="#000000", fg="white", bg="black", insertbackground="white")
-        self.output_text.grid(row=row, column=0, columnspan=2, pady=5)
+        # only the visible lines of the log are formatted, see virtualLog.VirtualLog
+        self.output_log = VirtualLog(self.left_frame, format_log_line, width=60, height=12, font=("Consolas", 11), relief=tk.FLAT, highlightthickness=1, highlightbackground="#000000", fg="white", bg="black", insertbackground="white")
+        self.output_log.grid(row=row, column=0, columnspan=2, pady=5)
         
         self.simulation_results = []
         self.current_step_index = -1
+        self.tree_renderer: DerivationTreeRenderer | None = None
+        # pending root.after job of the step slider
+        self.slider_job = None
+
+        # the simulation runs on a worker thread that posts its progress and result to this queue,
+        # the Tk thread reads it with root.after. run_id tells apart messages of an older (cancelled) run
+        self.simulation_queue: queue.Queue = queue.Queue()
+        self.cancel_event: threading.Event | None = None
+        self.worker: threading.Thread | None = None
+        self.run_id = 0
 
     def draw_derivation_tree(self):
-        self.canvas.delete('all')
-        if not self.simulation_results or self.current_step_index < 0:
+        if self.tree_renderer is None or not self.simulation_results or self.current_step_index < 0:
             return
+        self.tree_renderer.showUpTo(self.current_step_index)
 
-        level_height = 80
-        node_radius = 20
-
-        states_at_step = {} # step_num -> set of states
-        
-        for idx in range(self.current_step_index + 1):
-            step_dict = self.simulation_results[idx]
-            step_num = list(step_dict.keys())[0]
-            data = step_dict[step_num]
-            
-            if step_num not in states_at_step:
-                states_at_step[step_num] = set()
-            
-            # Add toStates
-            states_at_step[step_num].update(data['toStates'])
-            # Add fromStates
-            states_at_step[step_num].update(data['fromStates'])
-
-        # Calculate positions
-        positions = {} # (step_num, state) -> (x, y)
-        
-        current_width = self.canvas.winfo_width()
-        if current_width <= 1: current_width = 600
-        
-        # Determine max width needed
-        max_nodes = 0
-        for step_num, states in states_at_step.items():
-            max_nodes = max(max_nodes, len(states))
-            
-        min_spacing = 80
-        canvas_width = max(current_width, (max_nodes + 1) * min_spacing)
-        
-        for step_num, states in states_at_step.items():
-            sorted_states = sorted(list(states))
-            y = 50 + step_num * level_height
-            spacing = canvas_width / (len(sorted_states) + 1)
-            
-            for i, state in enumerate(sorted_states):
-                x = (i + 1) * spacing
-                positions[(step_num, state)] = (x, y)
-                
-        # draw the nodes
-        last_entry = self.simulation_results[self.current_step_index]
-        last_step_num = list(last_entry.keys())[0]
-        active_states = last_entry[last_step_num]['toStates']
-        
-        # colors
-        COLOR_PAST_FILL = '#ffffff'
-        COLOR_PAST_OUTLINE = '#000000'
-        COLOR_CURRENT_FILL = '#ffffcc'
-        COLOR_CURRENT_OUTLINE = '#000000'
-        COLOR_FINAL_OUTLINE = '#ff0000'
-        COLOR_TEXT = '#000000'
-        COLOR_EDGE = '#000000'
-
-        for (step_num, state), (x, y) in positions.items():
-            is_current = (step_num == last_step_num and state in active_states)
-            is_final = (state in self.nfa.finalStates)
-            
-            fill = COLOR_CURRENT_FILL if is_current else COLOR_PAST_FILL
-            outline = COLOR_FINAL_OUTLINE if is_final else (COLOR_CURRENT_OUTLINE if is_current else COLOR_PAST_OUTLINE)
-            width = 3 if is_final else (2 if is_current else 1)
-            
-            self.canvas.create_oval(x-node_radius, y-node_radius, x+node_radius, y+node_radius,
-                                    fill=fill, outline=outline, width=width)
-            self.canvas.create_text(x, y, text=str(state), font=('Segoe UI', 10, 'bold'), fill=COLOR_TEXT)
-            
-        # draw the edges
-        drawn_edges = set() #   avoid duplicates
-        for idx in range(self.current_step_index + 1):
-            step_dict = self.simulation_results[idx]
-            step_num = list(step_dict.keys())[0]
-            data = step_dict[step_num]
-            
-            symbol = data.get('symbol', '#') 
-            if symbol is None: symbol = "#"
-            
-            from_states = data['fromStates']
-            to_states = data['toStates']
-            
-            target_step = step_num
-            source_step = step_num if symbol == '#' else step_num - 1
-            
-            if symbol != '#' and idx > 0:
-
-                 if (step_num, symbol) not in drawn_edges:
-                     y_level = 50 + step_num * level_height
-                     self.canvas.create_text(30, y_level - level_height/2, text=f"'{symbol}'", font=('Segoe UI', 12, 'bold'), fill=COLOR_TEXT)
-                     drawn_edges.add((step_num, symbol))
-
-            for u in from_states:
-                if (source_step, u) not in positions: continue
-                
-                key = (u, symbol)
-                if key in self.nfa.transitions:
-                    targets = self.nfa.transitions[key]
-                    for v in targets:
-                        if v in to_states and (target_step, v) in positions:
-                            edge_key = (source_step, u, target_step, v, symbol)
-                            if edge_key in drawn_edges: continue
-                            drawn_edges.add(edge_key)
-
-                            x1, y1 = positions[(source_step, u)]
-                            x2, y2 = positions[(target_step, v)]
-                            
-                            dash = (4, 2) if symbol == '#' else ()
-                            
-                            if symbol == '#':
-
-                                if x1 < x2:
-                                    self.canvas.create_line(x1+node_radius, y1, x2-node_radius, y2, 
-                                                          arrow=tk.LAST, fill=COLOR_EDGE, width=1.5, dash=dash)
-                                elif x1 > x2:
-                                    self.canvas.create_line(x1-node_radius, y1, x2+node_radius, y2, 
-                                                          arrow=tk.LAST, fill=COLOR_EDGE, width=1.5, dash=dash)
-                                else:
-
-                                    pass
-                            else:
-                                 self.canvas.create_line(x1, y1+node_radius, x2, y2-node_radius, 
-                                                  arrow=tk.LAST, fill=COLOR_EDGE, width=1.5, smooth=True, dash=dash)
-        
-
-        self.canvas.config(scrollregion=self.canvas.bbox("all"))
-                                                  
-
-        self.canvas.update_idletasks()
-        bbox = self.canvas.bbox("all")
-        if bbox:
-            x1, y1, x2, y2 = bbox
-            self.canvas.configure(scrollregion=(x1-50, y1-50, x2+50, y2+50))
+    # the canvas scrolled (or was resized), draw the levels that came into view
+    def on_canvas_yscroll(self, first, last):
+        self.v_scroll.set(first, last)
+        if self.tree_renderer is not None:
+            self.tree_renderer.refreshVisible()
 
     def prev_step(self):
         if self.current_step_index > 0:
@@ -305,6 +200,8 @@ class NFAInputGUI:
             self.update_ui_for_step()
 
     def update_ui_for_step(self):
+        # Prev/Next or a new run win over a jump the slider still has pending
+        self.cancel_slider_jump()
         self.draw_derivation_tree()
         
 
@@ -312,50 +209,48 @@ class NFAInputGUI:
         self.next_button.config(state=tk.NORMAL if self.current_step_index < len(self.simulation_results) - 1 else tk.DISABLED)
         
 
-        self.output_text.tag_remove("highlight", "1.0", tk.END)
-        # Calculate line number: step 0 is line 1, step 1 is line 2...
-        line_num = self.current_step_index + 1
-        self.output_text.tag_add("highlight", f"{line_num}.0", f"{line_num}.end")
-        self.output_text.tag_config("highlight", background="#fff3cd", foreground="black")
-        self.output_text.see(f"{line_num}.0")
+        # the log has one row per trace entry, so the entry index is also the row
+        self.output_log.highlight(self.current_step_index)
+        self.step_slider.set(self.current_step_index)
+
+    def on_step_slider(self, value):
+        index = int(float(value))
+        # setting the slider from update_ui_for_step calls this back with the same index
+        if not self.simulation_results or index == self.current_step_index:
+            return
+        self.cancel_slider_jump()
+        self.slider_job = self.root.after(SLIDER_DELAY_MS, self.jump_to_step, index)
+
+    def jump_to_step(self, index):
+        self.slider_job = None
+        if index < len(self.simulation_results) and index != self.current_step_index:
+            self.current_step_index = index
+            self.update_ui_for_step()
+
+    def cancel_slider_jump(self):
+        if self.slider_job is not None:
+            self.root.after_cancel(self.slider_job)
+            self.slider_job = None
 
     def create_nfa(self):
         try:
-            alphabet = parse_alphabet(self.alphabet_entry.get())
-            num_states = int(self.num_states_entry.get())
-            start_states = parse_int_list(self.start_states_entry.get())
-            final_states = parse_int_list(self.final_states_entry.get())
-            transitions = parse_transitions(self.transitions_text.get("1.0", tk.END))
-
-            # validation
-            for state in start_states:
-                if not (0 <= state < num_states):
-                    raise ValueError(f"Start state {state} is out of range [0, {num_states-1}]")
-            for state in final_states:
-                if not (0 <= state < num_states):
-                    raise ValueError(f"Final state {state} is out of range [0, {num_states-1}]")
-            for (from_state, symbol), to_states in transitions.items():
-                if not (0 <= from_state < num_states):
-                    raise ValueError(f"From state {from_state} in transition is out of range [0, {num_states-1}]")
-                for to_state in to_states:
-                    if not (0 <= to_state < num_states):
-                        raise ValueError(f"To state {to_state} in transition is out of range [0, {num_states-1}]")
-                if symbol != '#' and symbol not in alphabet:
-                    raise ValueError(f"Symbol '{symbol}' not in alphabet {alphabet}")
-
-            self.nfa = NFA(
-                alphabet=alphabet,
-                numStates=num_states,
-                startStates=start_states,
-                finalStates=final_states,
-                transitions=transitions
+            self.nfa = nfaSpec.create_nfa(
+                self.alphabet_entry.get(),
+                self.num_states_entry.get(),
+                self.start_states_entry.get(),
+                self.final_states_entry.get(),
+                self.transitions_text.get("1.0", tk.END)
             )
 
             #reset simulation
+            self.cancel_simulation()
+            self.cancel_slider_jump()
             self.simulation_results = []
             self.current_step_index = -1
+            self.tree_renderer = None
             self.canvas.delete('all')
-            self.output_text.delete("1.0", tk.END)
+            self.output_log.clear()
+            self.step_slider.config(to=0, state=tk.DISABLED)
             self.prev_button.config(state=tk.DISABLED)
             self.next_button.config(state=tk.DISABLED)
 
@@ -373,33 +268,103 @@ class NFAInputGUI:
         if input_str is None:
             input_str = ""
 
-        # validate input string
-        for ch in input_str:
-            if ch not in self.nfa.alphabet:
-                messagebox.showerror("Error", f"Input string contains symbol '{ch}' not in alphabet {self.nfa.alphabet}.")
-                return
+        # a new run replaces the one in progress
+        self.cancel_simulation()
+        self.cancel_slider_jump()
+        self.run_id += 1
+        self.cancel_event = threading.Event()
+
+        self.output_log.clear()
+        self.step_slider.config(to=0, state=tk.DISABLED)
+        self.simulation_results = []
+        self.current_step_index = -1
+        self.tree_renderer = None
+        self.canvas.delete('all')
+        self.prev_button.config(state=tk.DISABLED)
+        self.next_button.config(state=tk.DISABLED)
+        self.progress_bar.config(maximum=max(len(input_str), 1), value=0)
+        self.cancel_button.config(state=tk.NORMAL)
+
+        self.worker = threading.Thread(target=self.simulation_worker,
+                                       args=(self.run_id, self.nfa, input_str, self.cancel_event), daemon=True)
+        self.worker.start()
+        self.root.after(50, self.poll_simulation, self.run_id)
+
+    # runs on the worker thread, it only talks to the Tk thread through simulation_queue
+    def simulation_worker(self, run_id, nfa, input_str, cancel_event):
+        def on_progress(done, total):
+            self.simulation_queue.put((run_id, "progress", done))
+
+        try:
+            # the derivation tree needs the lambda moves too,
+            # symbols outside the alphabet are rejected while the input is translated.
+            # long inputs only keep a checkpoint every CHECKPOINT_INTERVAL symbols and replay the rest on demand
+            if len(input_str) > CHECKPOINT_THRESHOLD:
+                simulation_data = CheckpointTrace(nfa, input_str, CHECKPOINT_INTERVAL, sd.TRACE_FULL,
+                                                  cancelEvent=cancel_event, onProgress=on_progress)
+            else:
+                simulation_data = nfa.processString(input_str, sd.TRACE_FULL, cancelEvent=cancel_event,
+                                                    onProgress=on_progress, progressEvery=max(len(input_str) // 100, 1))
+            self.simulation_queue.put((run_id, "done", simulation_data))
+        except SimulationCancelled:
+            self.simulation_queue.put((run_id, "cancelled", None))
+        except ValueError as e:
+            self.simulation_queue.put((run_id, "error", str(e)))
+        except Exception as e:
+            # anything else would never reach the queue and leave the UI polling with Cancel enabled
+            self.simulation_queue.put((run_id, "error", f"Simulation failed: {type(e).__name__}: {e}"))
+
+    def poll_simulation(self, run_id):
+        # a newer run has its own polling loop
+        if run_id != self.run_id:
+            return
+        while True:
+            try:
+                message_id, kind, payload = self.simulation_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message_id != self.run_id:
+                continue
+            if kind == "progress":
+                self.progress_bar.config(value=payload)
+                continue
+
+            self.cancel_event = None
+            self.cancel_button.config(state=tk.DISABLED)
+            if kind == "done":
+                self.show_simulation(payload)
+            elif kind == "error":
+                self.progress_bar.config(value=0)
+                messagebox.showerror("Error", payload)
+            return
 
-        simulation_data = self.nfa.processString(input_str)
+        self.root.after(50, self.poll_simulation, run_id)
 
-        self.output_text.delete("1.0", tk.END)
+    # the engine stops before its next symbol, waiting for it keeps two runs from sharing the NFA
+    def cancel_simulation(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+            self.worker.join()
+            self.run_id += 1
+            self.cancel_button.config(state=tk.DISABLED)
+            self.output_log.add_message("Simulation cancelled")
+
+    def show_simulation(self, simulation_data):
         self.simulation_results = simulation_data.getResults()
+        self.tree_renderer = DerivationTreeRenderer(self.canvas, self.nfa, self.simulation_results)
+        self.output_log.set_rows(self.simulation_results)
+        self.step_slider.config(to=max(len(self.simulation_results) - 1, 0), state=tk.NORMAL if self.simulation_results else tk.DISABLED)
 
         lastAccepted = False #To Track If Input Accepted Or No
-        # Display text results
-        for step_dict in self.simulation_results:
-            step = list(step_dict.keys())[0]
-            data = step_dict[step]
-            symbol_part = f"symbol = {data['symbol']}, " if 'symbol' in data else ""
-            line = (
-                f"Step {step}: "
-                f"{symbol_part}"
-                f"from = {data['fromStates']}, "
-                f"to = {data['toStates']}, "
-                f"accepted = {data['isAccepted']}\n"
-            )
-            lastAccepted=data['isAccepted']
-            self.output_text.insert(tk.END, line)
-            
+        if self.simulation_results:
+            last = self.simulation_results[-1]
+            lastAccepted = last[list(last.keys())[0]]['isAccepted']
+        if(lastAccepted):
+            self.output_log.add_message("Input Accepted")
+        else:
+            self.output_log.add_message("Input Rejected")
+
         # Start visualization at step 0
         if self.simulation_results:
             self.current_step_index = 0
@@ -407,11 +372,6 @@ class NFAInputGUI:
         else:
             self.current_step_index = -1
 
-        if(lastAccepted):
-            self.output_text.insert(tk.END,"Input Accepted")
-        else:
-            self.output_text.insert(tk.END,"Input Rejected")
-
 
 if __name__ == "__main__":
     root = tk.Tk()
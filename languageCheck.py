@@ -0,0 +1,136 @@
+from collections import deque
+
+
+# outcome of a language check. holds is None when the search hit its limit before deciding.
+# counterexample is a string showing why the check failed: accepted by the left automaton but not the
+# right one for inclusion/equivalence, any accepted string for emptiness
+class CheckResult:
+    def __init__(self, holds: bool | None, counterexample: str | None = None, stats: dict | None = None):
+        self.holds = holds
+        self.counterexample = counterexample
+        self.stats = stats or {}
+
+    def __bool__(self):
+        return bool(self.holds)
+
+    def __repr__(self):
+        return f"CheckResult(holds={self.holds}, counterexample={self.counterexample!r}, stats={self.stats})"
+
+
+# a search node and the way back to the start
+class Node:
+    __slots__ = ("state", "macro", "parent", "symbol")
+
+    def __init__(self, state: int, macro: frozenset[int], parent=None, symbol=None):
+        self.state = state
+        self.macro = macro
+        self.parent = parent
+        self.symbol = symbol
+
+    def word(self) -> str:
+        symbols = []
+        node = self
+        while node.parent is not None:
+            symbols.append(node.symbol)
+            node = node.parent
+        return "".join(reversed(symbols))
+
+
+# breadth first over single states (closure folded into the successor table), so the witness is a
+# shortest accepted string
+def isEmpty(automaton, maxStates=None) -> CheckResult:
+    numSymbols = automaton.numSymbols
+    queue = deque(Node(state, frozenset()) for state in sorted(automaton.startConfiguration()))
+    seen = {node.state for node in queue}
+    while queue:
+        node = queue.popleft()
+        if node.state in automaton.finalSet:
+            return CheckResult(False, node.word(), {"explored": len(seen)})
+        if maxStates is not None and len(seen) >= maxStates:
+            return CheckResult(None, None, {"explored": len(seen), "limitReached": True})
+        for symbol, symbolId in automaton.inputIds.items():
+            for target in automaton.successorTable[node.state * numSymbols + symbolId]:
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(Node(target, frozenset(), node, symbol))
+    return CheckResult(True, None, {"explored": len(seen)})
+
+
+# L(left) is a subset of L(right), with the antichain algorithm: the search runs over pairs
+# (state of left, configuration of right) looking for a final left state paired with a rejecting right
+# configuration. a pair (p, S) is subsumed by a pair (p, T) with T a subset of S, since whatever S would
+# reject T rejects too, so only the minimal configurations of every left state are kept (the antichain)
+# and nothing above them is explored. the right automaton is never determinized
+def isSubset(left, right, maxStates=None) -> CheckResult:
+    numSymbols = left.numSymbols
+    rightStart = right.startConfiguration()
+    antichain: dict[int, list[frozenset[int]]] = {}
+    stats = {"explored": 0, "pruned": 0, "evicted": 0}
+
+    def result(holds, counterexample=None) -> CheckResult:
+        stats["antichainSize"] = sum(len(kept) for kept in antichain.values())
+        return CheckResult(holds, counterexample, stats)
+
+    # a pair is checked when it's first generated, before a smaller one can evict it from the queue,
+    # so the first counterexample found is a shortest one
+    def rejected(node) -> bool:
+        return node.state in left.finalSet and right.finalSet.isdisjoint(node.macro)
+
+    def insert(node) -> bool:
+        kept = antichain.setdefault(node.state, [])
+        for macro in kept:
+            if macro <= node.macro:
+                stats["pruned"] += 1
+                return False
+        smaller = [macro for macro in kept if not node.macro <= macro]
+        stats["evicted"] += len(kept) - len(smaller)
+        smaller.append(node.macro)
+        antichain[node.state] = smaller
+        return True
+
+    queue = deque()
+    for state in sorted(left.startConfiguration()):
+        node = Node(state, rightStart)
+        if rejected(node):
+            return result(False, node.word())
+        if insert(node):
+            queue.append(node)
+
+    while queue:
+        # a pair evicted while waiting in the queue is still expanded: skipping it would push the words
+        # below it one symbol further down (through the smaller pair) and lose the shortest counterexample
+        node = queue.popleft()
+        stats["explored"] += 1
+        if maxStates is not None and stats["explored"] >= maxStates:
+            stats["limitReached"] = True
+            return result(None)
+
+        for symbol, symbolId in left.inputIds.items():
+            targets = left.successorTable[node.state * numSymbols + symbolId]
+            if not targets:
+                continue
+            # a symbol outside the right alphabet leaves it with no states, '#' included: for the right
+            # automaton that is an input symbol, not a lambda move
+            macro = right.stepId(node.macro, right.inputIds.get(symbol, -1))
+            for target in targets:
+                child = Node(target, macro, node, symbol)
+                if rejected(child):
+                    return result(False, child.word())
+                if insert(child):
+                    queue.append(child)
+    return result(True)
+
+
+def isEquivalent(left, right, maxStates=None) -> CheckResult:
+    forward = isSubset(left, right, maxStates)
+    if forward.holds is False:
+        forward.stats = {"direction": "left not in right", **forward.stats}
+        return forward
+    backward = isSubset(right, left, maxStates)
+    stats = {key: forward.stats.get(key, 0) + backward.stats.get(key, 0)
+             for key in ("explored", "pruned", "evicted", "antichainSize")}
+    if backward.holds is False:
+        return CheckResult(False, backward.counterexample, {"direction": "right not in left", **stats})
+    if forward.holds is None or backward.holds is None:
+        return CheckResult(None, None, {**stats, "limitReached": True})
+    return CheckResult(True, None, stats)
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+
+EVICTION_POLICIES = ("flush", "lru")
+
+
+# one interned configuration of the NFA, used as a DFA state.
+# next maps symbol -> DFAState for the transitions discovered so far,
+# incoming remembers who points here so an evicted state can be unlinked
+class DFAState:
+    __slots__ = ("states", "accepting", "next", "incoming", "live")
+
+    def __init__(self, states: frozenset[int], accepting: bool):
+        self.states = states
+        self.accepting = accepting
+        self.next: dict[str, DFAState] = {}
+        self.incoming: set[tuple[DFAState, str]] = set()
+        self.live = True
+
+
+# on-the-fly subset construction: every distinct configuration reached while matching is interned
+# once and its transitions are memoized, so after warm-up a step is one dict lookup per character.
+# at most maxStates configurations are kept, when the cache is full either everything is dropped
+# ("flush") or the least recently used state is evicted ("lru")
+class LazyDFA:
+    def __init__(self, automaton, maxStates=1024, policy="flush"):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{policy}', expected one of {EVICTION_POLICIES}")
+        if maxStates < 1:
+            raise ValueError("maxStates should be at least 1")
+
+        self.nfa = automaton
+        self.maxStates = maxStates
+        self.policy = policy
+        self.cache: OrderedDict[frozenset[int], DFAState] = OrderedDict()
+
+        self.steps = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+
+        self.start = self.intern(automaton.startConfiguration())
+        self.current = self.start
+
+    def intern(self, states: frozenset[int]) -> DFAState:
+        state = self.cache.get(states)
+        if state is not None:
+            # a target found again through a new edge counts as a use too
+            if self.policy == "lru":
+                self.cache.move_to_end(states)
+            return state
+
+        if len(self.cache) >= self.maxStates:
+            if self.policy == "flush":
+                self.flush()
+            else:
+                self.evict(self.cache.popitem(last=False)[1])
+
+        state = DFAState(states, not self.nfa.finalSet.isdisjoint(states))
+        self.cache[states] = state
+        return state
+
+    def flush(self):
+        for state in self.cache.values():
+            state.live = False
+            state.next.clear()
+            state.incoming.clear()
+        self.cache.clear()
+        self.flushes += 1
+
+    def evict(self, state: DFAState):
+        state.live = False
+        for source, symbol in state.incoming:
+            if source.next.get(symbol) is state:
+                del source.next[symbol]
+        for symbol, target in state.next.items():
+            target.incoming.discard((state, symbol))
+        state.next.clear()
+        state.incoming.clear()
+        self.evictions += 1
+
+    # cache miss: compute the successor configuration and memoize the edge
+    def addTransition(self, state: DFAState, symbol: str) -> DFAState:
+        self.misses += 1
+        target = self.intern(self.nfa.step(state.states, symbol))
+        # interning may have evicted the source, edges are only kept between live states
+        if state.live and target.live:
+            state.next[symbol] = target
+            target.incoming.add((state, symbol))
+        return target
+
+    def startState(self) -> DFAState:
+        if not self.start.live:
+            self.start = self.intern(self.start.states)
+        elif self.policy == "lru":
+            self.cache.move_to_end(self.start.states)
+        return self.start
+
+    # runs the whole string from the start configuration and returns the DFA state it ends in
+    def run(self, inputString) -> DFAState:
+        return self.runFrom(self.startState(), inputString)
+
+    # same as run but continues from the given DFA state, used to match input piece by piece
+    def runFrom(self, state: DFAState, inputString) -> DFAState:
+        if self.policy == "lru":
+            cache = self.cache
+            for symbol in inputString:
+                nxt = state.next.get(symbol)
+                if nxt is None:
+                    nxt = self.addTransition(state, symbol)
+                elif nxt.live:
+                    cache.move_to_end(nxt.states)
+                state = nxt
+        else:
+            for symbol in inputString:
+                nxt = state.next.get(symbol)
+                if nxt is None:
+                    nxt = self.addTransition(state, symbol)
+                state = nxt
+        self.steps += len(inputString)
+        return state
+
+    def accepts(self, inputString) -> bool:
+        return self.run(inputString).accepting
+
+    # same step by step interface as NFA
+    def reset(self):
+        self.current = self.startState()
+
+    def move(self, symbol: str):
+        state = self.current
+        nxt = state.next.get(symbol)
+        if nxt is None:
+            nxt = self.addTransition(state, symbol)
+        elif self.policy == "lru" and nxt.live:
+            self.cache.move_to_end(nxt.states)
+        self.steps += 1
+        self.current = nxt
+
+    def isAccepted(self) -> bool:
+        return self.current.accepting
+
+    def getCurrentStates(self) -> frozenset[int]:
+        return self.current.states
+
+    def getStats(self) -> dict[str, int]:
+        return {
+            "steps": self.steps,
+            "hits": self.steps - self.misses,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "flushes": self.flushes,
+            "cachedStates": len(self.cache),
+        }
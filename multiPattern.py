@@ -0,0 +1,68 @@
+import NFA as nfa
+import simulationData as sd
+
+
+# one NFA holding several patterns side by side: pattern i keeps its own states, shifted into
+# [offsets[i], offsets[i] + numStates_i), and every final state is tagged with the pattern it belongs to.
+# the ranges never share a transition, so a single run carries all the patterns at once and the
+# accepting patterns are read off the final configuration. the alphabet is the union of the alphabets,
+# a symbol one pattern doesn't know simply leaves that pattern with no states
+class TaggedNFA(nfa.NFA):
+    def __init__(self, automata, traceLevel: int = sd.TRACE_NONE, maxStates=4096):
+        if not automata:
+            raise ValueError("At least one automaton is needed")
+
+        alphabet = list(dict.fromkeys(symbol for automaton in automata for symbol in automaton.alphabet))
+        self.offsets: list[int] = []
+        numStates = 0
+        startStates, finalStates = [], []
+        transitions: dict[tuple[int, str], list[int]] = {}
+        self.patternOfState: list[int] = []
+        for pattern, automaton in enumerate(automata):
+            offset = numStates
+            self.offsets.append(offset)
+            startStates.extend(state + offset for state in automaton.startStates)
+            finalStates.extend(state + offset for state in automaton.finalStates)
+            for (state, symbol), targets in automaton.transitions.items():
+                transitions[(state + offset, symbol)] = [target + offset for target in targets]
+            self.patternOfState.extend([pattern] * automaton.numStates)
+            numStates += automaton.numStates
+
+        self.numPatterns = len(automata)
+        # the lazy DFA used by matches(), built on first use and shared by all the patterns
+        self.maxStates = maxStates
+        self.dfa = None
+        # final configuration -> accepting patterns, so a repeated configuration is only decoded once
+        self.patternCache: dict[frozenset[int], frozenset[int]] = {}
+        super().__init__(alphabet, numStates, startStates, finalStates, transitions, traceLevel)
+
+    # pattern ids with a final state in the configuration
+    def patternsOf(self, states) -> frozenset[int]:
+        return frozenset(self.patternOfState[state] for state in self.finalSet.intersection(states))
+
+    # the patterns that accept the string, in one pass over the shared lazy DFA
+    def matches(self, inputString) -> frozenset[int]:
+        if self.dfa is None:
+            self.dfa = self.lazyDFA(self.maxStates)
+        states = self.dfa.run(inputString).states
+        patterns = self.patternCache.get(states)
+        if patterns is None:
+            if len(self.patternCache) >= self.maxStates:
+                self.patternCache.clear()
+            patterns = self.patternCache[states] = self.patternsOf(states)
+        return patterns
+
+    # same as matches but steps the NFA itself. a symbol outside the alphabet matches nothing, like accepts()
+    def matchingPatterns(self, inputString) -> frozenset[int]:
+        states = self.startConfiguration()
+        for symbolId in self.translate(inputString, strict=False):
+            states = self.stepId(states, symbolId)
+        return self.patternsOf(states)
+
+    # step by step counterpart of isAccepted
+    def getMatchedPatterns(self) -> frozenset[int]:
+        return self.patternsOf(self.currentStates)
+
+
+def union(automata, traceLevel: int = sd.TRACE_NONE, maxStates=4096) -> TaggedNFA:
+    return TaggedNFA(list(automata), traceLevel, maxStates)
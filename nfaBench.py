@@ -0,0 +1,217 @@
+# benchmark suite for the NFA engine on generated automata, with results written as JSON so runs
+# can be compared over time:
+#
+#   python nfaBench.py --output bench.json
+#   python nfaBench.py --quick
+#
+# every case measures processString throughput (symbols/sec) and per step latency at each trace level,
+# the peak memory of a run (tracemalloc), lambdaClosure on the whole state set and the cost of
+# reading every entry back through SimulationData.getResults. every case also runs the same input through
+# the other engines (bitset NFA, lazy DFA) at TRACE_NONE, so their throughput can be compared
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import NFA as nfa
+import bitsetNFA as bnfa
+import simulationData as sd
+
+LEVEL_NAMES = {sd.TRACE_NONE: "none", sd.TRACE_STEPS: "steps", sd.TRACE_FULL: "full"}
+
+
+# generators, all of them return the NFA constructor arguments over the alphabet a,b
+
+def randomNFA(numStates: int, seed=0, density=0.6, lambdaDensity=0.15):
+    rng = random.Random(seed)
+    transitions = {}
+    for state in range(numStates):
+        for symbol in ('a', 'b', '#'):
+            if rng.random() < (lambdaDensity if symbol == '#' else density):
+                transitions[(state, symbol)] = rng.sample(range(numStates), rng.randint(1, 3))
+    # the start state loops on both symbols, so a run never dies out and every symbol gets measured
+    for symbol in ('a', 'b'):
+        transitions[(0, symbol)] = sorted(set(transitions.get((0, symbol), [])) | {0})
+    finalStates = rng.sample(range(numStates), max(numStates // 10, 1))
+    return ['a', 'b'], numStates, [0], finalStates, transitions
+
+
+# 0 -#-> 1 -#-> ... -#-> n-1, every closure is a suffix of the chain
+def lambdaChain(numStates: int):
+    transitions = {(state, '#'): [state + 1] for state in range(numStates - 1)}
+    transitions[(numStates - 1, 'a')] = [0]
+    transitions[(numStates - 1, 'b')] = [numStates - 1]
+    return ['a', 'b'], numStates, [0], [numStates - 1], transitions
+
+
+# one big '#' cycle, every state has the whole automaton as its closure
+def lambdaCycle(numStates: int):
+    transitions = {}
+    for state in range(numStates):
+        transitions[(state, '#')] = [(state + 1) % numStates]
+        transitions[(state, 'a')] = [(state + 2) % numStates]
+        transitions[(state, 'b')] = [state]
+    return ['a', 'b'], numStates, [0], [0], transitions
+
+
+# (a|b)*a(a|b)^k: k + 2 states, but its minimal DFA needs 2^(k+1) states
+def subsetBlowup(k: int):
+    transitions = {(0, 'a'): [0, 1], (0, 'b'): [0]}
+    for state in range(1, k + 1):
+        transitions[(state, 'a')] = [state + 1]
+        transitions[(state, 'b')] = [state + 1]
+    return ['a', 'b'], k + 2, [0], [k + 1], transitions
+
+
+# every symbol from the start state fans out to `width` states that keep each other alive
+def fanOut(width: int):
+    transitions = {(0, 'a'): list(range(1, width + 1)), (0, 'b'): [0]}
+    for state in range(1, width + 1):
+        transitions[(state, 'a')] = [state, state % width + 1]
+        transitions[(state, 'b')] = [0, state]
+    return ['a', 'b'], width + 1, [0], [width], transitions
+
+
+def randomInput(length: int, seed=0) -> str:
+    rng = random.Random(seed)
+    return "".join(rng.choice("ab") for _ in range(length))
+
+
+def percentile(sortedValues, fraction):
+    return sortedValues[min(int(fraction * len(sortedValues)), len(sortedValues) - 1)]
+
+
+def timeBest(run, repeat) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def timeRun(automaton, inputString, level, repeat) -> float:
+    return timeBest(lambda: automaton.processString(inputString, level), repeat)
+
+
+# latency of single moves, timed one by one on the first `samples` symbols
+def stepLatencies(automaton, inputString, level, samples) -> dict[str, float]:
+    automaton.traceLevel = level
+    automaton.simulationData = sd.SimulationData()
+    automaton.reset()
+    timings = []
+    clock = time.perf_counter_ns
+    for step, symbolId in enumerate(automaton.translate(inputString[:samples]), 1):
+        start = clock()
+        automaton.moveId(symbolId, step)
+        timings.append(clock() - start)
+    # an empty input (or samples=0) has no step to time
+    if not timings:
+        return {"p50Ns": None, "p99Ns": None, "maxNs": None}
+    timings.sort()
+    return {"p50Ns": percentile(timings, 0.5), "p99Ns": percentile(timings, 0.99), "maxNs": timings[-1]}
+
+
+def peakMemory(automaton, inputString, level) -> int:
+    tracemalloc.start()
+    try:
+        automaton.processString(inputString, level)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# whole input at TRACE_NONE on each engine. the lazy DFA is timed warm, its first run builds the states
+def engineComparison(spec, inputString, repeat) -> dict:
+    setEngine = nfa.NFA(*spec, traceLevel=sd.TRACE_NONE)
+    bitsetEngine = bnfa.BitsetNFA(*spec, traceLevel=sd.TRACE_NONE)
+    dfa = setEngine.lazyDFA()
+    dfa.accepts(inputString)
+    runs = {
+        "set": lambda: setEngine.processString(inputString),
+        "bitset": lambda: bitsetEngine.processString(inputString),
+        "lazyDFA": lambda: dfa.accepts(inputString),
+    }
+    engines = {}
+    for engine, run in runs.items():
+        seconds = timeBest(run, repeat)
+        engines[engine] = {"seconds": seconds, "symbolsPerSec": len(inputString) / seconds if seconds else None}
+    return engines
+
+
+def benchCase(name: str, params: dict, spec, inputLength: int, repeat=3, samples=2000) -> dict:
+    automaton = nfa.NFA(*spec)
+    inputString = randomInput(inputLength, seed=inputLength)
+    result = {"name": name, "params": params, "numStates": automaton.numStates,
+              "transitions": sum(len(targets) for targets in automaton.transitions.values()),
+              "inputLength": inputLength, "levels": {}}
+
+    for level, levelName in LEVEL_NAMES.items():
+        seconds = timeRun(automaton, inputString, level, repeat)
+        result["levels"][levelName] = {
+            "seconds": seconds,
+            "symbolsPerSec": inputLength / seconds if seconds else None,
+            "meanStepNs": seconds * 1e9 / inputLength if inputLength else None,
+            **stepLatencies(automaton, inputString, level, samples),
+            "peakBytes": peakMemory(automaton, inputString, level),
+        }
+
+    allStates = set(range(automaton.numStates))
+    automaton.traceLevel = sd.TRACE_NONE
+    start = time.perf_counter()
+    for _ in range(100):
+        automaton.lambdaClosure(allStates)
+    result["lambdaClosureNs"] = (time.perf_counter() - start) * 1e9 / 100
+
+    automaton.processString(inputString, sd.TRACE_FULL)
+    start = time.perf_counter()
+    entries = sum(1 for _ in automaton.simulationData.getResults())
+    result["getResults"] = {"entries": entries, "seconds": time.perf_counter() - start}
+    result["engines"] = engineComparison(spec, inputString, repeat)
+    return result
+
+
+# (name, params, spec, input length)
+def cases(quick=False):
+    scale = 1 if quick else 4
+    length = 1000 * scale
+    yield "random", {"numStates": 50}, randomNFA(50, seed=1), length
+    yield "random", {"numStates": 100 * scale}, randomNFA(100 * scale, seed=2), length
+    yield "lambdaChain", {"numStates": 100 * scale}, lambdaChain(100 * scale), length
+    yield "lambdaCycle", {"numStates": 50 * scale}, lambdaCycle(50 * scale), length
+    for k in (4, 12):
+        yield "subsetBlowup", {"k": k}, subsetBlowup(k), length
+    yield "fanOut", {"width": 25 * scale}, fanOut(25 * scale), length
+
+
+def runSuite(quick=False, repeat=3) -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "quick": quick,
+        "results": [benchCase(name, params, spec, length, repeat) for name, params, spec, length in cases(quick)],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the NFA engine on generated automata.")
+    parser.add_argument("--quick", action="store_true", help="smaller automata and inputs")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best one is kept")
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = json.dumps(runSuite(args.quick, args.repeat), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import NFA as nfa
+import bitsetNFA as bnfa
+import compiledDFA as compiled
+import nfaSpec
+import simulationData as sd
+
+# binary layout. the header is little endian, the arrays use the byte order of the machine that wrote
+# them (recorded in the header, a file from another byte order is rebuilt):
+#   header   MAGIC, VERSION, byte order, number of sections
+#   sections name (8 bytes), array typecode, offset, item count (one entry per section)
+#   data     every section is a flat array starting on an 8 byte boundary
+# the meta section is JSON (alphabet, symbols, sizes), every other section is an array:
+#   start, final                      start and final states
+#   tfrom, tsym, toff, tto            transitions: edge i goes from tfrom[i] on symbols[tsym[i]]
+#                                     to tto[toff[i]:toff[i+1]]
+#   setoff, setmem                    every distinct set of states once: set k is setmem[setoff[k]:setoff[k+1]]
+#   clset                             lambda closure of state s: set clset[s]
+#   tpos, sucset                      the flat tables of NFA.buildSuccessorTables, at index
+#                                     state * numSymbols + symbolId: the targets are those of edge tpos[index]
+#                                     and the successors (closure folded in) are set sucset[index],
+#                                     both -1 when there is no transition
+#   dfatab, dfaacc                    the compiled DFA table and accepting flags, when it was compiled
+MAGIC = b"NFAC"
+VERSION = 2
+HEADER = struct.Struct("<4sHBxI")
+SECTION = struct.Struct("<8scxxxxxxxQQ")
+ALIGN = 8
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "nfa")
+BYTE_ORDERS = {"little": 0, "big": 1}
+
+
+# the cache key: the spec text itself plus the format version, so old files are never misread
+def specKey(text: str) -> str:
+    return hashlib.sha256(f"{VERSION}\n{text}".encode("utf-8")).hexdigest()
+
+
+# a table of the cache file decoded into the Python objects NFA expects: entry i is entries[positions[i]],
+# or empty when the position is -1. the entries are decoded once each and shared, nothing is recomputed.
+# the tables stay plain lists: a lazy view over the mapping (a dict filled on lookup) made a step 1.5x slower
+def decodeTable(positions, entries, empty) -> list:
+    return [entries[position] if position >= 0 else empty for position in positions.tolist()]
+
+
+def decodeSlices(offsets, members, kind) -> list:
+    members = members.tolist()
+    offsets = offsets.tolist()
+    return [kind(members[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
+
+
+# an NFA rebuilt from a cache file: the closure table and the target/successor tables come from the file,
+# so neither Tarjan nor buildSuccessorTables run. cachePath lets the worker pools map the same file
+class CachedNFA(nfa.NFA):
+    def __init__(self, alphabet, numStates, startStates, finalStates, transitions, closureTable,
+                 targetTable, successorTable, traceLevel: int = sd.TRACE_STEPS, cachePath=None):
+        self.cachedClosures = closureTable
+        self.cachedTables = (targetTable, successorTable)
+        self.cachePath = cachePath
+        super().__init__(alphabet, numStates, startStates, finalStates, transitions, traceLevel)
+
+    def buildClosureTable(self) -> list[frozenset[int]]:
+        return self.cachedClosures
+
+    def buildSuccessorTables(self):
+        self.targetTable, self.successorTable = self.cachedTables
+
+
+# the bitset engine on top of the cached tables, only its masks are computed
+class CachedBitsetNFA(bnfa.BitsetNFA, CachedNFA):
+    pass
+
+
+CACHED_ENGINES = {nfa.NFA: CachedNFA, bnfa.BitsetNFA: CachedBitsetNFA}
+
+
+def save(path: str, automaton, dfa=None):
+    symbols = list(dict.fromkeys([symbol for (_, symbol) in automaton.transitions]))
+    symbolIndex = {symbol: i for i, symbol in enumerate(symbols)}
+    tfrom, tsym, toff, tto = array('i'), array('i'), array('i', [0]), array('i')
+    for (state, symbol), targets in automaton.transitions.items():
+        tfrom.append(state)
+        tsym.append(symbolIndex[symbol])
+        tto.extend(targets)
+        toff.append(len(tto))
+    # the closures of one strongly connected component and the successors of many edges are the same set,
+    # it is stored once
+    setIds: dict[frozenset[int], int] = {}
+    setoff, setmem = array('i', [0]), array('i')
+
+    def setId(states) -> int:
+        if states not in setIds:
+            setIds[states] = len(setIds)
+            setmem.extend(sorted(states))
+            setoff.append(len(setmem))
+        return setIds[states]
+
+    clset = array('i', [setId(closure) for closure in automaton.closureTable])
+    size = automaton.numStates * automaton.numSymbols
+    tpos, sucset = array('i', [-1]) * size, array('i', [-1]) * size
+    for edge, (state, symbol) in enumerate(automaton.transitions):
+        index = state * automaton.numSymbols + automaton.symbolIds[symbol]
+        tpos[index] = edge
+        sucset[index] = setId(automaton.successorTable[index])
+
+    meta = {"alphabet": automaton.alphabet, "numStates": automaton.numStates, "symbols": symbols}
+    sections = {
+        "start": array('i', automaton.startStates),
+        "final": array('i', automaton.finalStates),
+        "tfrom": tfrom, "tsym": tsym, "toff": toff, "tto": tto,
+        "setoff": setoff, "setmem": setmem, "clset": clset,
+        "tpos": tpos, "sucset": sucset,
+    }
+    if dfa is not None:
+        meta["dfa"] = {"alphabet": dfa.alphabet, "startState": dfa.startState,
+                       "subsetStates": dfa.subsetStates, "minimizedStates": dfa.minimizedStates}
+        sections["dfatab"] = array('i', dfa.table)
+        sections["dfaacc"] = array('b', dfa.accepting)
+    sections = {"meta": array('B', json.dumps(meta).encode("utf-8")), **sections}
+
+    offset = HEADER.size + SECTION.size * len(sections)
+    entries, blobs = [], []
+    for name, data in sections.items():
+        offset += -offset % ALIGN
+        entries.append(SECTION.pack(name.encode("ascii"), data.typecode.encode("ascii"), offset, len(data)))
+        blobs.append((offset, data.tobytes()))
+        offset += len(data) * data.itemsize
+
+    # written next to the target and renamed, so a reader never sees half a file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDERS[sys.byteorder], len(sections)))
+        f.writelines(entries)
+        for start, blob in blobs:
+            f.write(b"\0" * (start - f.tell()))
+            f.write(blob)
+    os.replace(temporary, path)
+
+
+# maps the file and returns its sections as memoryviews over the mapping, nothing is copied
+def mapSections(path: str) -> dict[str, memoryview]:
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    if len(view) < HEADER.size:
+        raise ValueError(f"{path} is not an NFA cache file")
+    magic, version, byteOrder, count = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not an NFA cache file of version {VERSION}")
+    if byteOrder != BYTE_ORDERS[sys.byteorder]:
+        raise ValueError(f"{path} was written on a machine with another byte order")
+
+    sections = {}
+    for i in range(count):
+        name, typecode, offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+        typecode = typecode.decode("ascii")
+        size = length * array(typecode).itemsize
+        if offset + size > len(view):
+            raise ValueError(f"{path} is truncated")
+        sections[name.rstrip(b"\0").decode("ascii")] = view[offset:offset + size].cast(typecode)
+    return sections
+
+
+# returns (NFA, CompiledDFA or None) from a cache file. engine is NFA or BitsetNFA, the automaton
+# comes back as its cached subclass
+def load(path: str, traceLevel: int = sd.TRACE_STEPS, engine=nfa.NFA):
+    sections = mapSections(path)
+    meta = json.loads(bytes(sections["meta"]))
+    symbols = meta["symbols"]
+
+    tfrom, tsym, toff, tto = sections["tfrom"], sections["tsym"], sections["toff"], sections["tto"]
+    targets = decodeSlices(toff, tto, list)
+    transitions = {(state, symbols[symbol]): edgeTargets
+                   for state, symbol, edgeTargets in zip(tfrom.tolist(), tsym.tolist(), targets)}
+    sets = decodeSlices(sections["setoff"], sections["setmem"], frozenset)
+    closureTable = [sets[setId] for setId in sections["clset"].tolist()]
+    targetTable = decodeTable(sections["tpos"], [tuple(edgeTargets) for edgeTargets in targets], ())
+    successorTable = decodeTable(sections["sucset"], sets, frozenset())
+
+    automaton = CACHED_ENGINES[engine](meta["alphabet"], meta["numStates"], sections["start"].tolist(),
+                                       sections["final"].tolist(), transitions, closureTable,
+                                       targetTable, successorTable, traceLevel, path)
+    dfa = None
+    if "dfa" in meta:
+        info = meta["dfa"]
+        # the table stays a memoryview over the mapping
+        dfa = compiled.CompiledDFA(info["alphabet"], sections["dfatab"], sections["dfaacc"], info["startState"],
+                                   info["subsetStates"], info["minimizedStates"])
+    return automaton, dfa
+
+
+# loads a spec file through the cache: on a hit parsing, validation, the closure, the successor tables
+# and (with compile=True) the DFA construction are all skipped, on a miss the spec is parsed and the result
+# stored for next time.
+# returns (NFA, CompiledDFA or None)
+def loadSpec(specPath: str, cacheDir: str = DEFAULT_CACHE_DIR, traceLevel: int = sd.TRACE_STEPS, compile=False):
+    with open(specPath, encoding="utf-8") as f:
+        text = f.read()
+    path = os.path.join(cacheDir, specKey(text) + ".nfac")
+
+    if os.path.exists(path):
+        try:
+            automaton, dfa = load(path, traceLevel)
+            if dfa is not None or not compile:
+                return automaton, dfa
+        except (ValueError, KeyError, struct.error):
+            # unreadable file, rebuilt below
+            pass
+
+    automaton = nfaSpec.parse_spec(text, traceLevel)
+    dfa = automaton.compile() if compile else None
+    os.makedirs(cacheDir, exist_ok=True)
+    save(path, automaton, dfa)
+    automaton.cachePath = path
+    return automaton, dfa
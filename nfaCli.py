@@ -0,0 +1,117 @@
+# command line matcher for headless machines: loads a spec file (see nfaSpec.parse_spec) and prints a
+# verdict for every input line, as TSV or JSON lines. never imports tkinter.
+#
+#   python nfaCli.py spec.txt inputs.txt > verdicts.tsv
+#   cat inputs.txt | python nfaCli.py spec.txt --format jsonl --trace
+import argparse
+import json
+import sys
+
+import nfaCache
+import nfaSpec
+import simulationData as sd
+
+READ_BUFFER = 1 << 20
+# output lines written per write() call
+WRITE_BATCH = 4096
+
+
+def read_lines(paths):
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        if path == "-":
+            stream = sys.stdin
+        else:
+            stream = open(path, encoding="utf-8", buffering=READ_BUFFER)
+        try:
+            for line in stream:
+                yield line.rstrip("\r\n")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+# one configuration per step, the start configuration first
+def trace_of(automaton, line) -> list[list[int]]:
+    automaton.processString(line, sd.TRACE_STEPS)
+    return [sorted(entry[next(iter(entry))]["toStates"]) for entry in automaton.simulationData.getResults()]
+
+
+def format_tsv(line, accepted, error, trace) -> str:
+    verdict = "error" if error else ("accepted" if accepted else "rejected")
+    fields = [line, verdict]
+    if error:
+        fields.append(error)
+    elif trace is not None:
+        fields.append(";".join("{" + ",".join(map(str, states)) + "}" for states in trace))
+    return "\t".join(fields) + "\n"
+
+
+def format_jsonl(line, accepted, error, trace) -> str:
+    record = {"input": line, "accepted": accepted}
+    if error:
+        record["error"] = error
+    elif trace is not None:
+        record["trace"] = trace
+    return json.dumps(record) + "\n"
+
+
+FORMATTERS = {"tsv": format_tsv, "jsonl": format_jsonl}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run strings through an NFA without the GUI.")
+    parser.add_argument("spec", help="NFA spec file")
+    parser.add_argument("inputs", nargs="*", help="files with one input string per line (default: stdin)")
+    parser.add_argument("--format", choices=sorted(FORMATTERS), default="tsv")
+    parser.add_argument("--trace", action="store_true", help="also print the configuration after every step")
+    parser.add_argument("--engine", choices=("lazy", "nfa"), default="lazy",
+                        help="lazy: memoized DFA (fast on many strings), nfa: plain NFA with early exit")
+    parser.add_argument("--cache-dir", help="keep the parsed automaton in this directory (see nfaCache)")
+    parser.add_argument("-o", "--output", help="write the verdicts here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        if args.cache_dir:
+            automaton, _ = nfaCache.loadSpec(args.spec, args.cache_dir, sd.TRACE_NONE)
+        else:
+            automaton = nfaSpec.load_spec(args.spec, sd.TRACE_NONE)
+    except (OSError, ValueError) as e:
+        print(f"Error while creating NFA: {e}", file=sys.stderr)
+        return 2
+
+    dfa = automaton.lazyDFA() if args.engine == "lazy" else None
+    formatter = FORMATTERS[args.format]
+    out = open(args.output, "w", encoding="utf-8", buffering=READ_BUFFER) if args.output else sys.stdout
+    pending = []
+    try:
+        for line in read_lines(args.inputs):
+            accepted, error, trace = False, None, None
+            try:
+                if args.trace:
+                    trace = trace_of(automaton, line)
+                    accepted = automaton.isAccepted()
+                elif dfa is not None:
+                    accepted = dfa.accepts(line)
+                else:
+                    accepted = automaton.accepts(line)
+            except ValueError as e:
+                error = str(e)
+            pending.append(formatter(line, accepted, error, trace))
+            if len(pending) >= WRITE_BATCH:
+                out.writelines(pending)
+                pending.clear()
+        out.writelines(pending)
+        out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+from collections import deque
+
+import NFA as nfa
+
+
+# what one pass did to the automaton
+class PassReport:
+    def __init__(self, name: str, statesBefore: int, statesAfter: int,
+                 transitionsBefore: int, transitionsAfter: int):
+        self.name = name
+        self.statesBefore = statesBefore
+        self.statesAfter = statesAfter
+        self.transitionsBefore = transitionsBefore
+        self.transitionsAfter = transitionsAfter
+
+    def statesRemoved(self) -> int:
+        return self.statesBefore - self.statesAfter
+
+    def transitionsRemoved(self) -> int:
+        return self.transitionsBefore - self.transitionsAfter
+
+    def __repr__(self):
+        return (f"PassReport({self.name}: states {self.statesBefore} -> {self.statesAfter}, "
+                f"transitions {self.transitionsBefore} -> {self.transitionsAfter})")
+
+
+# number of (from, symbol, to) edges
+def countTransitions(automaton) -> int:
+    return sum(len(set(targets)) for targets in automaton.transitions.values())
+
+
+def rebuild(automaton, numStates, startStates, finalStates, transitions):
+    return nfa.NFA(automaton.alphabet, numStates, startStates, finalStates, transitions, automaton.traceLevel)
+
+
+def report(name, before, after) -> PassReport:
+    return PassReport(name, before.numStates, after.numStates, countTransitions(before), countTransitions(after))
+
+
+# removes every '#' transition: a state gets the symbol edges of its whole lambda closure,
+# and becomes final when its closure holds a final state, so the language stays the same.
+# the states only reached through '#' are left unreachable for trim to drop.
+# ('#' is always treated as lambda here, even when it is also listed in the alphabet)
+def removeLambda(automaton):
+    transitions: dict[tuple[int, str], list[int]] = {}
+    for state in range(automaton.numStates):
+        for symbol in automaton.symbols:
+            if symbol == '#':
+                continue
+            targets = set()
+            for member in automaton.closureTable[state]:
+                targets.update(automaton.transitions.get((member, symbol), ()))
+            if targets:
+                transitions[(state, symbol)] = sorted(targets)
+
+    finalStates = [state for state in range(automaton.numStates)
+                   if not automaton.finalSet.isdisjoint(automaton.closureTable[state])]
+    result = rebuild(automaton, automaton.numStates, automaton.startStates, finalStates, transitions)
+    return result, report("removeLambda", automaton, result)
+
+
+# keeps only the states reachable from the start states that can still reach a final state
+def trim(automaton):
+    forward = [[] for _ in range(automaton.numStates)]
+    backward = [[] for _ in range(automaton.numStates)]
+    for (state, _), targets in automaton.transitions.items():
+        for target in targets:
+            forward[state].append(target)
+            backward[target].append(state)
+
+    reachable = search(automaton.startStates, forward)
+    useful = reachable & search(automaton.finalStates, backward)
+    # the start states stay even when they are useless, an NFA needs something to start from
+    keep = sorted(useful | set(automaton.startStates))
+    result = renumberStates(automaton, keep)
+    return result, report("trim", automaton, result)
+
+
+def search(roots, edges) -> set[int]:
+    seen = set(roots)
+    stack = list(roots)
+    while stack:
+        state = stack.pop()
+        for nxt in edges[state]:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return seen
+
+
+# renumbers the states densely in BFS order from the start states (symbols in alphabet order),
+# so states that are stepped through together sit next to each other in the tables
+def renumber(automaton):
+    order = list(dict.fromkeys(automaton.startStates))
+    seen = set(order)
+    queue = deque(order)
+    while queue:
+        state = queue.popleft()
+        for symbol in automaton.symbols:
+            for target in automaton.transitions.get((state, symbol), ()):
+                if target not in seen:
+                    seen.add(target)
+                    order.append(target)
+                    queue.append(target)
+    # unreachable states keep their relative order at the end
+    order.extend(state for state in range(automaton.numStates) if state not in seen)
+    result = renumberStates(automaton, order)
+    return result, report("renumber", automaton, result)
+
+
+# builds the automaton restricted to `order`, where order[i] becomes state i
+def renumberStates(automaton, order: list[int]):
+    newId = {state: i for i, state in enumerate(order)}
+    transitions: dict[tuple[int, str], list[int]] = {}
+    for (state, symbol), targets in automaton.transitions.items():
+        if state not in newId:
+            continue
+        kept = sorted({newId[target] for target in targets if target in newId})
+        if kept:
+            transitions[(newId[state], symbol)] = kept
+    startStates = [newId[state] for state in automaton.startStates if state in newId]
+    finalStates = sorted(newId[state] for state in automaton.finalStates if state in newId)
+    return rebuild(automaton, len(order), startStates, finalStates, transitions)
+
+
+DEFAULT_PASSES = (removeLambda, trim, renumber)
+
+
+# runs the passes in order and returns the optimized automaton and one report per pass
+def optimize(automaton, passes=DEFAULT_PASSES):
+    reports = []
+    for optimizationPass in passes:
+        automaton, passReport = optimizationPass(automaton)
+        reports.append(passReport)
+    return automaton, reports
@@ -0,0 +1,276 @@
+# matching service for other local processes: loads the automata once and answers newline delimited JSON.
+#
+#   python nfaServer.py even.txt odd.txt --port 8765
+#   python nfaServer.py even.txt --unix /tmp/nfa.sock
+#
+# request  {"id": 1, "automaton": "even", "input": "abab"}   (automaton may be left out when only one is loaded)
+#          {"id": 2, "op": "stats"}
+# response {"id": 1, "accepted": true}  or  {"id": 1, "error": "..."}
+# responses come back in request order on each connection, so a client can pipeline.
+#
+# requests from all connections go into one bounded queue. a single batcher waits for the first one,
+# collects whatever else arrives within `window` seconds (up to maxBatch) and evaluates the whole batch
+# in one pass on a worker thread, grouped per automaton on its lazy DFA. when the queue is full the
+# connections stop reading, so a flood of requests turns into TCP backpressure instead of memory
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import nfaCache
+import nfaSpec
+import simulationData as sd
+
+# latencies kept for the percentiles
+LATENCY_WINDOW = 10000
+# longest request line, anything longer gets an error answer and is skipped
+DEFAULT_LINE_LIMIT = 1 << 20
+
+
+class MatchServer:
+    def __init__(self, automata: dict, window=0.002, maxBatch=256, maxPending=10000, maxInFlight=1024,
+                 maxStates=1024, lineLimit=DEFAULT_LINE_LIMIT):
+        if not automata:
+            raise ValueError("At least one automaton is needed")
+        if maxBatch < 1:
+            raise ValueError("maxBatch should be at least 1")
+
+        self.automata = automata
+        self.matchers = {name: automaton.lazyDFA(maxStates) for name, automaton in automata.items()}
+        self.window = window
+        self.maxBatch = maxBatch
+        self.maxPending = maxPending
+        # responses one connection may have waiting before it stops reading
+        self.maxInFlight = maxInFlight
+        self.lineLimit = lineLimit
+        self.queue: asyncio.Queue | None = None
+        self.batcher: asyncio.Task | None = None
+        self.server: asyncio.AbstractServer | None = None
+        # the lazy DFAs are not thread safe, all the batches run on this one thread
+        self.executor = ThreadPoolExecutor(1)
+
+        self.requests = 0
+        self.batches = 0
+        self.batched = 0
+        self.errors = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        self.queue = asyncio.Queue(self.maxPending)
+        self.batcher = asyncio.create_task(self.runBatches())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handleConnection, path, limit=self.lineLimit)
+        else:
+            self.server = await asyncio.start_server(self.handleConnection, host, port, limit=self.lineLimit)
+        return self.server
+
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.batcher is not None:
+            self.batcher.cancel()
+            try:
+                await self.batcher
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown()
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        responses: asyncio.Queue = asyncio.Queue(self.maxInFlight)
+        sender = asyncio.create_task(self.sendResponses(responses, writer))
+        try:
+            # once the sender has lost the connection nobody reads the answers anymore
+            while not sender.done() and not writer.is_closing():
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # end of the stream, maybe with a last line without newline
+                    if e.partial.strip():
+                        await responses.put(await self.submit(e.partial))
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.skipLine(reader)
+                    self.errors += 1
+                    await responses.put(self.answer({"id": None, "error": "Bad request: line too long"}))
+                    continue
+                if line.strip():
+                    await responses.put(await self.submit(line))
+        except ConnectionError:
+            pass
+        finally:
+            await responses.put(None)
+            await sender
+
+    # drops the rest of an overlong line, the stream continues with the next request
+    async def skipLine(self, reader: asyncio.StreamReader):
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                return
+
+    @staticmethod
+    def answer(response: dict) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(response)
+        return future
+
+    async def sendResponses(self, responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                pending = await responses.get()
+                if pending is None:
+                    return
+                writer.write(json.dumps(await pending).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            writer.close()
+            # keep taking the answers until the reader has stopped, so it never waits on a full queue
+            while await responses.get() is not None:
+                pass
+        finally:
+            writer.close()
+
+    # parses one request line and returns a future for its response
+    async def submit(self, line: bytes) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        requestId = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request is a JSON object")
+            requestId = request.get("id")
+            if request.get("op") == "stats":
+                future.set_result({"id": requestId, "stats": self.getStats()})
+                return future
+            name = request.get("automaton")
+            if name is None and len(self.automata) == 1:
+                name = next(iter(self.automata))
+            if name not in self.automata:
+                raise ValueError(f"Unknown automaton '{name}', expected one of {sorted(self.automata)}")
+            inputString = request["input"]
+            if not isinstance(inputString, str):
+                raise ValueError("input should be a string")
+        except (ValueError, KeyError) as e:
+            self.errors += 1
+            future.set_result({"id": requestId, "error": f"Bad request: {e}"})
+            return future
+
+        self.requests += 1
+        await self.queue.put((name, inputString, requestId, future, time.perf_counter()))
+        return future
+
+    async def runBatches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.maxBatch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            results = await loop.run_in_executor(self.executor, self.evaluate, batch)
+            self.batches += 1
+            self.batched += len(batch)
+            now = time.perf_counter()
+            for (_, _, requestId, future, started), result in zip(batch, results):
+                result["id"] = requestId
+                self.latencies.append(now - started)
+                if not future.done():
+                    future.set_result(result)
+
+    # one pass over the batch on the worker thread, grouped per automaton
+    def evaluate(self, batch) -> list[dict]:
+        results = [None] * len(batch)
+        groups: dict[str, list[int]] = {}
+        for index, (name, *_rest) in enumerate(batch):
+            groups.setdefault(name, []).append(index)
+        for name, indexes in groups.items():
+            matcher = self.matchers[name]
+            for index in indexes:
+                results[index] = {"accepted": matcher.accepts(batch[index][1])}
+        return results
+
+    def getStats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return latencies[min(int(fraction * len(latencies)), len(latencies) - 1)] * 1000
+
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "meanBatch": self.batched / self.batches if self.batches else 0,
+            "errors": self.errors,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "p50Ms": percentile(0.5),
+            "p90Ms": percentile(0.9),
+            "p99Ms": percentile(0.99),
+        }
+
+
+# with cacheDir the automata go through nfaCache, see nfaCli --cache-dir
+def load_automata(paths, cacheDir=None) -> dict:
+    automata = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if cacheDir:
+            automata[name] = nfaCache.loadSpec(path, cacheDir, sd.TRACE_NONE)[0]
+        else:
+            automata[name] = nfaSpec.load_spec(path, sd.TRACE_NONE)
+    return automata
+
+
+async def serve(args):
+    server = MatchServer(load_automata(args.specs, args.cache_dir), args.window_ms / 1000, args.max_batch, args.max_pending,
+                         lineLimit=args.line_limit)
+    await server.start(args.host, args.port, args.unix)
+    print(f"Serving {sorted(server.automata)} on {args.unix or server.address()}", file=sys.stderr)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve NFA acceptance queries as newline delimited JSON.")
+    parser.add_argument("specs", nargs="+", help="spec files, each automaton is named after its file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="how long a batch waits for more requests")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-pending", type=int, default=10000, help="queued requests before reading stops")
+    parser.add_argument("--cache-dir", help="keep the parsed automata in this directory (see nfaCache)")
+    parser.add_argument("--line-limit", type=int, default=DEFAULT_LINE_LIMIT, help="longest request line in bytes")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# parsing and validation of an NFA description, shared by the GUI and the command line tool.
+# nothing here imports tkinter
+from NFA import NFA
+import simulationData as sd
+
+
+def parse_alphabet(s: str) -> list[str]:
+    return [x.strip() for x in s.split(',') if x.strip() != ""]
+
+
+def parse_int_list(s: str) -> list[int]:
+    if not s.strip():
+        return []
+    return [int(x.strip()) for x in s.split(',') if x.strip() != ""]
+
+
+def parse_transitions(s: str) -> dict[tuple[int, str], list[int]]:
+    """
+    Line should be:
+    from_state,symbol,to1,to2,...
+    examble:
+    0,a,0,1
+    1,b,2
+    0,#,2
+    """
+    transitions: dict[tuple[int, str], list[int]] = {}
+    lines = s.strip().splitlines()
+
+    for line in lines:
+        if not line.strip():
+            continue
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) < 3:
+            raise ValueError("Each line should be: from_state,symbol,to1,to2,...")
+
+        from_state = int(parts[0])
+        symbol = parts[1]
+        to_states = [int(p) for p in parts[2:]]
+
+        key = (from_state, symbol)
+        if key in transitions:
+            transitions[key].extend(to_states)
+        else:
+            transitions[key] = to_states
+
+    return transitions
+
+
+def validate_nfa(alphabet, num_states, start_states, final_states, transitions):
+    for state in start_states:
+        if not (0 <= state < num_states):
+            raise ValueError(f"Start state {state} is out of range [0, {num_states-1}]")
+    for state in final_states:
+        if not (0 <= state < num_states):
+            raise ValueError(f"Final state {state} is out of range [0, {num_states-1}]")
+    for (from_state, symbol), to_states in transitions.items():
+        if not (0 <= from_state < num_states):
+            raise ValueError(f"From state {from_state} in transition is out of range [0, {num_states-1}]")
+        for to_state in to_states:
+            if not (0 <= to_state < num_states):
+                raise ValueError(f"To state {to_state} in transition is out of range [0, {num_states-1}]")
+        if symbol != '#' and symbol not in alphabet:
+            raise ValueError(f"Symbol '{symbol}' not in alphabet {alphabet}")
+
+
+# builds the NFA from the same texts the GUI fields hold
+def create_nfa(alphabet_text: str, num_states_text: str, start_text: str, final_text: str,
+               transitions_text: str, trace_level: int = sd.TRACE_STEPS) -> NFA:
+    alphabet = parse_alphabet(alphabet_text)
+    num_states = int(num_states_text)
+    start_states = parse_int_list(start_text)
+    final_states = parse_int_list(final_text)
+    transitions = parse_transitions(transitions_text)
+    validate_nfa(alphabet, num_states, start_states, final_states, transitions)
+    return NFA(
+        alphabet=alphabet,
+        numStates=num_states,
+        startStates=start_states,
+        finalStates=final_states,
+        transitions=transitions,
+        traceLevel=trace_level
+    )
+
+
+SPEC_FIELDS = ("alphabet", "states", "start", "final")
+
+
+def parse_spec(text: str, trace_level: int = sd.TRACE_STEPS) -> NFA:
+    """
+    A spec file holds the GUI fields, one per line, then the transitions:
+    alphabet: a,b
+    states: 3
+    start: 0
+    final: 2
+    transitions:
+    0,a,0,1
+    1,b,2
+    0,#,2
+    """
+    fields = {}
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        name, sep, value = line.partition(':')
+        name = name.strip().lower()
+        if not sep or (name not in SPEC_FIELDS and name != "transitions"):
+            raise ValueError(f"Line {i+1}: expected one of {SPEC_FIELDS + ('transitions',)} followed by ':'")
+        if name == "transitions":
+            fields[name] = "\n".join([value] + lines[i+1:])
+            break
+        fields[name] = value
+
+    for name in SPEC_FIELDS:
+        if name not in fields:
+            raise ValueError(f"The spec has no '{name}:' line")
+    return create_nfa(fields["alphabet"], fields["states"], fields["start"], fields["final"],
+                      fields.get("transitions", ""), trace_level)
+
+
+def load_spec(path: str, trace_level: int = sd.TRACE_STEPS) -> NFA:
+    with open(path, encoding="utf-8") as f:
+        return parse_spec(f.read(), trace_level)
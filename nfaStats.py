@@ -0,0 +1,152 @@
+import time
+
+import simulationData as sd
+
+PHASES = ("move", "lambdaClosure", "recordMove", "recordLambdaMove")
+
+
+# counters and phase timings of an instrumented automaton.
+# hooks are called as hook(stats) every `hookEvery` moves and at the end of every processString,
+# so they can push the counters somewhere else (a metrics pipeline, a log, a progress bar)
+class EngineStats:
+    def __init__(self, hookEvery=1000):
+        self.hooks = []
+        self.hookEvery = hookEvery
+        self.reset()
+
+    def reset(self):
+        self.moves = 0
+        # (state, symbol) -> target edges taken by the moves
+        self.transitionsFired = 0
+        # moves whose lambda closure added states to the targets
+        self.closureExpansions = 0
+        # '#' edges leaving the states of each new configuration
+        self.lambdaEdges = 0
+        self.activeTotal = 0
+        self.maxActive = 0
+        self.runs = 0
+        # phase -> calls and total nanoseconds. move includes the other phases of its step, and at TRACE_NONE
+        # the closure is folded into the successor tables so lambdaClosure only runs on reset
+        self.phaseCalls = dict.fromkeys(PHASES, 0)
+        self.phaseNs = dict.fromkeys(PHASES, 0)
+
+    def addHook(self, hook):
+        self.hooks.append(hook)
+
+    def removeHook(self, hook):
+        self.hooks.remove(hook)
+
+    def fireHooks(self):
+        for hook in self.hooks:
+            hook(self)
+
+    def meanActive(self) -> float:
+        return self.activeTotal / self.moves if self.moves else 0.0
+
+    def addTime(self, phase: str, ns: int):
+        self.phaseCalls[phase] += 1
+        self.phaseNs[phase] += ns
+
+    def asDict(self) -> dict:
+        return {
+            "moves": self.moves,
+            "runs": self.runs,
+            "transitionsFired": self.transitionsFired,
+            "closureExpansions": self.closureExpansions,
+            "lambdaEdges": self.lambdaEdges,
+            "maxActive": self.maxActive,
+            "meanActive": self.meanActive(),
+            "phases": {phase: {"calls": self.phaseCalls[phase], "ns": self.phaseNs[phase]} for phase in PHASES},
+        }
+
+
+# instrumentation works by putting wrappers on the instance, in front of the class methods.
+# the class itself is never touched, so an automaton without them runs the exact same code as before
+WRAPPED = ("moveId", "lambdaClosure", "reset", "processString")
+
+
+def instrument(automaton, stats: EngineStats | None = None) -> EngineStats:
+    if stats is None:
+        stats = EngineStats()
+    uninstrument(automaton)
+    clock = time.perf_counter_ns
+    engineClass = type(automaton)
+    moveId = engineClass.moveId.__get__(automaton)
+    lambdaClosure = engineClass.lambdaClosure.__get__(automaton)
+    reset = engineClass.reset.__get__(automaton)
+    processString = engineClass.processString.__get__(automaton)
+    lambdaId = automaton.symbolIds['#']
+    numSymbols = automaton.numSymbols
+    targetTable = automaton.targetTable
+    wrappedTrace = [None]
+
+    def timedRecord(phase, record):
+        def wrapper(*args):
+            start = clock()
+            record(*args)
+            stats.addTime(phase, clock() - start)
+        return wrapper
+
+    # a new trace object comes with every processString, its record methods are wrapped once
+    def wrapTrace():
+        trace = automaton.simulationData
+        if trace is not wrappedTrace[0]:
+            wrappedTrace[0] = trace
+            trace.recordMove = timedRecord("recordMove", sd.SimulationData.recordMove.__get__(trace))
+            trace.recordLambdaMove = timedRecord("recordLambdaMove",
+                                                 sd.SimulationData.recordLambdaMove.__get__(trace))
+
+    # processString resets right after creating its trace, so the lambda move of the start states and
+    # the initial recordMove are timed too
+    def instrumentedReset():
+        wrapTrace()
+        reset()
+
+    def instrumentedMoveId(symbolId, currentStep=0, symbol=None):
+        wrapTrace()
+        fromStates = automaton.getCurrentStates()
+        start = clock()
+        moveId(symbolId, currentStep, symbol)
+        stats.addTime("move", clock() - start)
+
+        toStates = automaton.getCurrentStates()
+        targets = set()
+        if symbolId >= 0:
+            for state in fromStates:
+                edges = targetTable[state * numSymbols + symbolId]
+                stats.transitionsFired += len(edges)
+                targets.update(edges)
+        stats.moves += 1
+        if len(toStates) > len(targets):
+            stats.closureExpansions += 1
+        stats.lambdaEdges += sum(len(targetTable[state * numSymbols + lambdaId]) for state in toStates)
+        stats.activeTotal += len(toStates)
+        stats.maxActive = max(stats.maxActive, len(toStates))
+        if stats.hooks and stats.moves % stats.hookEvery == 0:
+            stats.fireHooks()
+
+    def instrumentedLambdaClosure(states, currentStep=0):
+        start = clock()
+        closure = lambdaClosure(states, currentStep)
+        stats.addTime("lambdaClosure", clock() - start)
+        return closure
+
+    def instrumentedProcessString(*args, **kwargs):
+        try:
+            return processString(*args, **kwargs)
+        finally:
+            stats.runs += 1
+            stats.fireHooks()
+
+    automaton.moveId = instrumentedMoveId
+    automaton.lambdaClosure = instrumentedLambdaClosure
+    automaton.reset = instrumentedReset
+    automaton.processString = instrumentedProcessString
+    automaton.stats = stats
+    return stats
+
+
+def uninstrument(automaton):
+    for name in WRAPPED:
+        automaton.__dict__.pop(name, None)
+    automaton.__dict__.pop("stats", None)
@@ -0,0 +1,84 @@
+# optional NumPy backend: the automaton becomes one boolean state x state matrix per symbol
+# (with the lambda closure already folded in) and a configuration is a boolean vector,
+# so a step is one vector-matrix product and a batch of strings moves together as a strings x states matrix
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class NumpyNFA:
+    def __init__(self, automaton):
+        if np is None:
+            raise ImportError("The NumPy backend needs numpy, install it with 'pip install numpy'")
+
+        self.nfa = automaton
+        numStates = automaton.numStates
+        self.alphabet = list(dict.fromkeys(automaton.alphabet))
+        self.symbolIds = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        # the last matrix stands for every symbol outside the alphabet and has no transitions
+        self.unknownId = len(self.alphabet)
+
+        closure = np.zeros((numStates, numStates), dtype=bool)
+        for state, states in enumerate(automaton.closureTable):
+            closure[state, list(states)] = True
+
+        self.matrices = np.zeros((len(self.alphabet) + 1, numStates, numStates), dtype=bool)
+        for (state, symbol), targets in automaton.transitions.items():
+            symbolId = self.symbolIds.get(symbol)
+            if symbolId is not None:
+                self.matrices[symbolId, state, targets] = True
+        for symbolId in range(len(self.alphabet)):
+            self.matrices[symbolId] = self.matrices[symbolId] @ closure
+
+        self.startVector = np.zeros(numStates, dtype=bool)
+        self.startVector[list(automaton.startConfiguration())] = True
+        self.finalMask = np.zeros(numStates, dtype=bool)
+        self.finalMask[list(automaton.finalSet)] = True
+        self.reset()
+
+    def symbolId(self, symbol: str) -> int:
+        return self.symbolIds.get(symbol, self.unknownId)
+
+    def reset(self):
+        self.currentVector = self.startVector.copy()
+
+    def move(self, symbol: str):
+        self.currentVector = self.currentVector @ self.matrices[self.symbolId(symbol)]
+
+    def isAccepted(self) -> bool:
+        return bool((self.currentVector & self.finalMask).any())
+
+    def getCurrentStates(self) -> frozenset[int]:
+        return frozenset(np.flatnonzero(self.currentVector).tolist())
+
+    def accepts(self, inputString) -> bool:
+        vector = self.startVector
+        for symbol in inputString:
+            vector = vector @ self.matrices[self.symbolId(symbol)]
+        return bool((vector & self.finalMask).any())
+
+    # strings x positions matrix of symbol ids, shorter strings are padded with -1
+    def encodeBatch(self, strings: list[str]):
+        length = max((len(s) for s in strings), default=0)
+        encoded = np.full((len(strings), length), -1, dtype=np.int32)
+        for row, inputString in enumerate(strings):
+            encoded[row, :len(inputString)] = [self.symbolId(symbol) for symbol in inputString]
+        return encoded
+
+    # advances every string at once and returns the final strings x states configuration matrix.
+    # at every position the rows are grouped by symbol, a padded (finished) row is left as it is
+    def runBatch(self, strings: list[str]):
+        encoded = self.encodeBatch(strings)
+        configurations = np.tile(self.startVector, (len(strings), 1))
+        for position in range(encoded.shape[1]):
+            column = encoded[:, position]
+            for symbolId in np.unique(column):
+                if symbolId < 0:
+                    continue
+                rows = column == symbolId
+                configurations[rows] = configurations[rows] @ self.matrices[symbolId]
+        return configurations
+
+    def acceptsBatch(self, strings: list[str]):
+        return (self.runBatch(strings) & self.finalMask).any(axis=1)
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+
+# one cached prefix: the configuration reached after reading it
+class TrieNode:
+    __slots__ = ("states", "children", "parent", "symbolId")
+
+    def __init__(self, states: frozenset[int], parent=None, symbolId=-1):
+        self.states = states
+        self.children: dict[int, TrieNode] = {}
+        self.parent = parent
+        self.symbolId = symbolId
+
+
+# remembers the configuration after every prefix it has seen, in a trie keyed by symbol ids,
+# so a string only steps through the symbols after its longest cached prefix.
+# at most maxNodes prefixes are kept (the root doesn't count) and only the first maxDepth symbols of a
+# string are cached. eviction is LRU over the nodes: every lookup touches its path from the leaf up to
+# the root, so a node is always more recent than its descendants and the oldest node is always a leaf
+class PrefixCache:
+    # hits and misses count symbols: served from the trie or stepped through the NFA
+    def __init__(self, automaton, maxNodes=100000, maxDepth=256):
+        if maxNodes < 1:
+            raise ValueError("maxNodes should be at least 1")
+
+        self.nfa = automaton
+        self.maxNodes = maxNodes
+        self.maxDepth = maxDepth
+        self.root = TrieNode(automaton.startConfiguration())
+        self.lru: OrderedDict[TrieNode, None] = OrderedDict()
+
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # the configuration after the whole string (symbol ids, see NFA.translate)
+    def runIds(self, symbolIds) -> frozenset[int]:
+        self.lookups += 1
+        node = self.root
+        depth = 0
+        limit = min(len(symbolIds), self.maxDepth)
+        while depth < limit:
+            child = node.children.get(symbolIds[depth])
+            if child is None:
+                break
+            node = child
+            depth += 1
+        self.hits += depth
+        self.misses += len(symbolIds) - depth
+
+        step = self.nfa.stepId
+        while depth < limit:
+            symbolId = symbolIds[depth]
+            child = TrieNode(step(node.states, symbolId), node, symbolId)
+            node.children[symbolId] = child
+            node = child
+            depth += 1
+
+        states = node.states
+        for symbolId in symbolIds[depth:]:
+            states = step(states, symbolId)
+        self.touch(node)
+        return states
+
+    def run(self, inputString) -> frozenset[int]:
+        return self.runIds(self.nfa.translate(inputString, strict=False))
+
+    def accepts(self, inputString) -> bool:
+        return not self.nfa.finalSet.isdisjoint(self.run(inputString))
+
+    # marks the path to node as the most recently used, leaf first, then trims the cache to its budget
+    def touch(self, node: TrieNode):
+        lru = self.lru
+        while node is not self.root:
+            lru[node] = None
+            lru.move_to_end(node)
+            node = node.parent
+        while len(lru) > self.maxNodes:
+            victim = lru.popitem(last=False)[0]
+            del victim.parent.children[victim.symbolId]
+            victim.parent = None
+            self.evictions += 1
+
+    def clear(self):
+        self.root.children.clear()
+        self.lru.clear()
+
+    def __len__(self):
+        return len(self.lru)
+
+    def getStats(self) -> dict[str, int]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "cachedPrefixes": len(self.lru),
+        }
@@ -0,0 +1,27 @@
+# automata shared by the tests: a spec file text and a generator of random NFAs
+
+import random
+
+# a* and a+b: 0 loops on a and guesses the last one, the lambda move makes 0 accepting
+SPEC = """alphabet: a,b
+states: 3
+start: 0
+final: 2
+transitions:
+0,a,0,1
+1,b,2
+0,#,2
+"""
+
+
+# NFA constructor arguments: every state gets each symbol (and '#', less often) with 1 to 3 targets
+def random_automaton(seed, numStates=40, alphabet=('a', 'b')):
+    rng = random.Random(seed)
+    transitions = {}
+    for state in range(numStates):
+        for symbol in list(alphabet) + ['#']:
+            if rng.random() < (0.15 if symbol == '#' else 0.6):
+                transitions[(state, symbol)] = rng.sample(range(numStates), rng.randint(1, 3))
+    startStates = [0]
+    finalStates = rng.sample(range(numStates), 3)
+    return list(alphabet), numStates, startStates, finalStates, transitions
@@ -0,0 +1,161 @@
+import codecs
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import batchMatcher as batch
+import bitsetNFA as bnfa
+
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+# the bitset engine of the current worker, built once from the spec shipped by the pool initializer
+workerEngine = None
+
+
+# the transfer relation of a piece of input: relation[s] is the mask of the states reached from state s
+# after reading it (closure included). a closed configuration C ends in the union of relation[s] for s in C,
+# and two relations compose by substitution, so the pieces of one input can be done in any order and
+# combined left to right afterwards.
+# all the states start together, grouped by their current mask: states that reach the same mask behave
+# the same from then on, so the groups merge and a chunk usually costs a few runs instead of numStates
+def transferRelation(engine, symbolIds) -> list[int]:
+    groups: dict[int, list[int]] = {1 << state: [state] for state in range(engine.numStates)}
+    step = engine.stepMaskId
+    for symbolId in symbolIds:
+        merged: dict[int, list[int]] = {}
+        for mask, origins in groups.items():
+            nxt = step(mask, symbolId)
+            if nxt in merged:
+                merged[nxt].extend(origins)
+            else:
+                merged[nxt] = origins
+        groups = merged
+
+    relation = [0] * engine.numStates
+    for mask, origins in groups.items():
+        for state in origins:
+            relation[state] = mask
+    return relation
+
+
+def applyRelation(relation: list[int], mask: int) -> int:
+    result = 0
+    while mask:
+        low = mask & -mask
+        result |= relation[low.bit_length() - 1]
+        mask ^= low
+    return result
+
+
+# first then second
+def composeRelations(first: list[int], second: list[int]) -> list[int]:
+    return [applyRelation(second, mask) for mask in first]
+
+
+def initWorker(spec):
+    global workerEngine
+    workerEngine = batch.buildAutomaton(spec, bnfa.BitsetNFA)
+
+
+def relationOfText(text: str) -> list[int]:
+    return transferRelation(workerEngine, workerEngine.translate(text))
+
+
+def relationOfFileChunk(path: str, start: int, end: int, encoding: str) -> list[int]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return relationOfText(data.decode(encoding))
+
+
+# true when every character is one byte. a multibyte (or stateful) encoding has bytes that only start
+# a character, its incremental decoder keeps them and returns nothing
+def singleByte(encoding: str) -> bool:
+    decoder = codecs.getincrementaldecoder(encoding)("replace")
+    for byte in range(256):
+        if decoder.decode(bytes([byte])) == "":
+            return False
+        decoder.reset()
+    return True
+
+
+# byte offsets that split the file in about chunkSize pieces without cutting a character. the cuts can
+# only be aligned for UTF-8 and single byte encodings, any other one raises ValueError
+def fileChunks(path: str, chunkSize: int, encoding: str) -> list[tuple[int, int]]:
+    utf8 = codecs.lookup(encoding).name == "utf-8"
+    if not utf8 and not singleByte(encoding):
+        raise ValueError(f"Can't split a {encoding} file into chunks, use UTF-8 or a single byte encoding")
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as file:
+        while bounds[-1] + chunkSize < size:
+            cut = bounds[-1] + chunkSize
+            if utf8:
+                # continuation bytes look like 10xxxxxx, the character starts at the first other byte
+                file.seek(cut)
+                tail = file.read(4)
+                while tail and tail[0] & 0xC0 == 0x80:
+                    cut += 1
+                    tail = tail[1:]
+            bounds.append(cut)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+class ScanResult:
+    def __init__(self, states: frozenset[int], accepted: bool, chunks: int):
+        self.states = states
+        self.accepted = accepted
+        self.chunks = chunks
+
+    def __repr__(self):
+        return f"ScanResult(accepted={self.accepted}, states={sorted(self.states)}, chunks={self.chunks})"
+
+
+# runs the tasks (function, args) on the pool and folds their relations into the configuration in order.
+# at most 2 * workers chunks are in flight, so only their relations are ever held in memory
+def fold(automaton, tasks, workers: int) -> ScanResult:
+    spec = batch.automatonSpec(automaton)
+    engine = batch.buildAutomaton(spec, bnfa.BitsetNFA)
+    mask = engine.closureMask(bnfa.statesToMask(automaton.startStates))
+    chunks = 0
+    if workers <= 1:
+        global workerEngine
+        saved, workerEngine = workerEngine, engine
+        try:
+            for task, args in tasks:
+                mask = applyRelation(task(*args), mask)
+                chunks += 1
+        finally:
+            workerEngine = saved
+    else:
+        with ProcessPoolExecutor(workers, initializer=initWorker,
+                                 initargs=(spec,)) as pool:
+            pending = deque()
+            for task, args in tasks:
+                pending.append(pool.submit(task, *args))
+                if len(pending) >= 2 * workers:
+                    mask = applyRelation(pending.popleft().result(), mask)
+                    chunks += 1
+            while pending:
+                mask = applyRelation(pending.popleft().result(), mask)
+                chunks += 1
+    return ScanResult(bnfa.maskToStates(mask), bool(mask & engine.finalMask), chunks)
+
+
+# same final configuration and verdict as processString, with the chunks done by `workers` processes.
+# like processString it raises ValueError on a symbol outside the alphabet
+def scanString(automaton, inputString, workers=None, chunkSize=DEFAULT_CHUNK_SIZE) -> ScanResult:
+    workers = workers or os.cpu_count() or 1
+    tasks = ((relationOfText, (inputString[start:start + chunkSize],))
+             for start in range(0, len(inputString), chunkSize))
+    return fold(automaton, tasks, workers)
+
+
+# the whole file is the input string. every worker reads its own byte range, only the offsets
+# and the relations go through the pool
+def scanFile(automaton, path, workers=None, chunkSize=DEFAULT_CHUNK_SIZE, encoding="utf-8") -> ScanResult:
+    workers = workers or os.cpu_count() or 1
+    tasks = ((relationOfFileChunk, (path, start, end, encoding))
+             for start, end in fileChunks(path, chunkSize, encoding))
+    return fold(automaton, tasks, workers)
@@ -1,57 +1,138 @@
+from array import array
+from collections.abc import Sequence
+
+# how much of a run gets recorded:
+#   TRACE_NONE  nothing, only the final configuration and the verdict are kept
+#   TRACE_STEPS one entry per input symbol (the configuration after its lambda closure)
+#   TRACE_FULL  the steps plus the lambda moves between them (what the derivation tree needs)
+TRACE_NONE = 0
+TRACE_STEPS = 1
+TRACE_FULL = 2
+TRACE_LEVELS = (TRACE_NONE, TRACE_STEPS, TRACE_FULL)
+
+
+def checkTraceLevel(level: int) -> int:
+    if level not in TRACE_LEVELS:
+        raise ValueError(f"Unknown trace level {level}, expected one of {TRACE_LEVELS}")
+    return level
+
+
 #this class will be just a DTO to hold the simulation data
+# the entries are kept column by column (struct of arrays) instead of one dict per step:
+#   steps     numOfStep of every entry
+#   symbolIds index into symbols, -1 for a lambda move (which has no symbol)
+#   fromIds   index into stateSets, the states before the entry
+#   toIds     index into stateSets, the states after the entry
+#   flags     ACCEPTED_FLAG | LAMBDA_FLAG
+# every distinct set of states is interned once as a frozenset and shared by all entries using it.
+# entries are kept in recording order, the NFA records the lambda moves of a step before the step itself
+ACCEPTED_FLAG = 1
+LAMBDA_FLAG = 2
+
+
 class SimulationData:
     def __init__(self):
-        # Dectionary to hold the simulation results as:
-        #  numOfStep : {
-        #               symbol : alphabet symbol
-        #               fromStates: set of current states before processing the symbol
-        #               toStates: set of states after processing the symbol
-        #               isAccepted: boolean indicating if the NFA is in an accepting state after processing the symbol
-        #              }
-        # onother dictionary to hold the lambda moves as:
-        #  numOfStep : {
-        #               fromStates: set of current states before processing the lambda move
-        #               toStates: set of states after processing the lambda move
-        #               isAccepted: boolean indicating if the NFA is in an accepting state after processing
-        #              }
-        
-        self.results = []
-        self.lambdaresults = []
-    
+        self.steps = array('q')
+        self.symbolIds = array('i')
+        self.fromIds = array('i')
+        self.toIds = array('i')
+        self.flags = array('b')
+
+        self.symbols: list[str | None] = []
+        self.symbolIndex: dict[str | None, int] = {}
+        self.stateSets: list[frozenset[int]] = []
+        self.stateSetIndex: dict[frozenset[int], int] = {}
+
+    def internStates(self, states) -> int:
+        if type(states) is not frozenset:
+            states = frozenset(states)
+        index = self.stateSetIndex.get(states)
+        if index is None:
+            index = len(self.stateSets)
+            self.stateSetIndex[states] = index
+            self.stateSets.append(states)
+        return index
+
+    def internSymbol(self, symbol) -> int:
+        index = self.symbolIndex.get(symbol)
+        if index is None:
+            index = len(self.symbols)
+            self.symbolIndex[symbol] = index
+            self.symbols.append(symbol)
+        return index
+
+    def record(self, numOfStep, symbolId: int, fromStates, toStates, flags: int):
+        self.steps.append(numOfStep)
+        self.symbolIds.append(symbolId)
+        self.fromIds.append(self.internStates(fromStates))
+        self.toIds.append(self.internStates(toStates))
+        self.flags.append(flags)
+
     # this function will record a move
     def recordMove(self, symbol: str, fromStates: set[int], toStates: set[int], isAccepted: bool, numOfStep):
-        self.results.append({
-            numOfStep: {
-                        "symbol": symbol,
-                        "fromStates": fromStates,
-                        "toStates": toStates, 
-                        "isAccepted": isAccepted,
-            }
-        })
+        self.record(numOfStep, self.internSymbol(symbol), fromStates, toStates,
+                    ACCEPTED_FLAG if isAccepted else 0)
+
     # this function will record a lambda move
     def recordLambdaMove(self, fromStates: set[int], toStates: set[int], isAccepted: bool, numOfStep):
-            self.lambdaresults.append({
-                numOfStep: {
-                            "fromStates": fromStates,
-                            "toStates": toStates, 
-                            "isAccepted": isAccepted,
-                }
-            })
-
-    # this function will return the recorded results as a list of dictionaries
-    def getResults(self):
-        results_combined = []
-        lambda_index = 0
-        for step_index in range(len(self.results)):
-            # Add lambda moves that occurred before this step
-            while (lambda_index < len(self.lambdaresults) and
-                   list(self.lambdaresults[lambda_index].keys())[0] <= step_index):
-                results_combined.append(self.lambdaresults[lambda_index])
-                lambda_index += 1
-            # Add the actual move
-            results_combined.append(self.results[step_index])
-        # Add any remaining lambda moves
-        while lambda_index < len(self.lambdaresults):
-            results_combined.append(self.lambdaresults[lambda_index])
-            lambda_index += 1
-        return results_combined
\ No newline at end of file
+        self.record(numOfStep, -1, fromStates, toStates,
+                    LAMBDA_FLAG | (ACCEPTED_FLAG if isAccepted else 0))
+
+    def __len__(self):
+        return len(self.steps)
+
+    # builds the dictionary of one entry:
+    #  numOfStep : {
+    #               symbol : alphabet symbol (moves only, None for the initial configuration)
+    #               fromStates: set of current states before the entry
+    #               toStates: set of states after the entry
+    #               isAccepted: boolean indicating if the NFA is in an accepting state after the entry
+    #               isLampda: True for a lambda move
+    #              }
+    def getEntry(self, index: int) -> dict:
+        flags = self.flags[index]
+        data = {}
+        if not flags & LAMBDA_FLAG:
+            data["symbol"] = self.symbols[self.symbolIds[index]]
+        data["fromStates"] = self.stateSets[self.fromIds[index]]
+        data["toStates"] = self.stateSets[self.toIds[index]]
+        data["isAccepted"] = bool(flags & ACCEPTED_FLAG)
+        data["isLampda"] = bool(flags & LAMBDA_FLAG)
+        return {self.steps[index]: data}
+
+    # this function will return the recorded results as a sequence of dictionaries,
+    # the dictionaries are only built when they are read
+    def getResults(self) -> "TraceView":
+        return TraceView(self)
+
+
+# read only list-like view over a SimulationData, compares equal to a list with the same entries
+class TraceView(Sequence):
+    def __init__(self, data: SimulationData):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.data.getEntry(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trace index out of range")
+        return self.data.getEntry(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.data.getEntry(index)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"TraceView({list(self)!r})"
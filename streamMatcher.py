@@ -0,0 +1,113 @@
+import codecs
+import mmap
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+# incremental matcher: the input is given piece by piece with feed() and the verdict comes from finish(),
+# so an input of any size is matched in constant memory.
+# the steps go through the automaton's lazy DFA (the same configurations NFA.reset/move would reach).
+# bytes are decoded with an incremental decoder, so a multi-byte character may be split between chunks.
+# with reportOffsets=True (or an onAccept callback) every offset where the run enters an accepting
+# configuration is reported, offset = number of symbols read so far (0 = the start configuration)
+class StreamMatcher:
+    def __init__(self, automaton, reportOffsets=False, onAccept=None, encoding="utf-8",
+                 maxStates=1024):
+        self.nfa = automaton
+        self.dfa = automaton.lazyDFA(maxStates)
+        self.reportOffsets = reportOffsets
+        self.onAccept = onAccept
+        self.encoding = encoding
+        self.reset()
+
+    def reset(self):
+        self.state = self.dfa.startState()
+        self.offset = 0
+        self.acceptOffsets: list[int] = []
+        self.decoder = codecs.getincrementaldecoder(self.encoding)()
+        self.finished = False
+        if self.state.accepting:
+            self.reportAccept(0)
+
+    def reportAccept(self, offset: int):
+        if self.reportOffsets:
+            self.acceptOffsets.append(offset)
+        if self.onAccept is not None:
+            self.onAccept(offset)
+
+    def feed(self, chunk):
+        if self.finished:
+            raise ValueError("feed() after finish(), call reset() to match a new input")
+        if not isinstance(chunk, str):
+            chunk = self.decoder.decode(chunk)
+        self.consume(chunk)
+
+    def consume(self, chunk: str):
+        state = self.state
+        # no states left, nothing can be accepted anymore so the rest is only counted
+        if not state.states:
+            self.offset += len(chunk)
+            return
+
+        if not self.reportOffsets and self.onAccept is None:
+            self.state = self.dfa.runFrom(state, chunk)
+            self.offset += len(chunk)
+            return
+
+        dfa = self.dfa
+        offset = self.offset
+        for symbol in chunk:
+            nxt = state.next.get(symbol)
+            if nxt is None:
+                nxt = dfa.addTransition(state, symbol)
+            offset += 1
+            if nxt.accepting and not state.accepting:
+                self.reportAccept(offset)
+            state = nxt
+        dfa.steps += len(chunk)
+        self.state = state
+        self.offset = offset
+
+    # flushes the decoder and returns the verdict for everything fed since the last reset
+    def finish(self) -> bool:
+        if not self.finished:
+            self.consume(self.decoder.decode(b"", final=True))
+            self.finished = True
+        return self.state.accepting
+
+    def isAccepted(self) -> bool:
+        return self.state.accepting
+
+    def getCurrentStates(self) -> frozenset[int]:
+        return self.state.states
+
+    # feeds a whole source and returns the verdict. the source can be a str, bytes, an mmap,
+    # a binary or text file object, or any iterable of str/bytes chunks
+    def scan(self, source, chunkSize=DEFAULT_CHUNK_SIZE) -> bool:
+        self.reset()
+        if isinstance(source, (str, bytes, bytearray)):
+            self.feed(source)
+        elif isinstance(source, (mmap.mmap, memoryview)):
+            for start in range(0, len(source), chunkSize):
+                self.feed(source[start:start + chunkSize])
+        elif hasattr(source, "read"):
+            while True:
+                chunk = source.read(chunkSize)
+                if not chunk:
+                    break
+                self.feed(chunk)
+        else:
+            for chunk in source:
+                self.feed(chunk)
+        return self.finish()
+
+    # scans a file through a read-only memory map, the file is never read into memory as a whole
+    def scanFile(self, path, chunkSize=DEFAULT_CHUNK_SIZE) -> bool:
+        with open(path, "rb") as file:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files can't be mapped
+                return self.scan(b"", chunkSize)
+            with mapped:
+                return self.scan(mapped, chunkSize)
@@ -0,0 +1,70 @@
+# batch acceptance should give the same verdicts as running the strings one by one
+
+import random
+
+import pytest
+
+import NFA as nfa
+import batchMatcher as batch
+from sampleAutomata import random_automaton
+
+
+def sample_strings(count, seed=5):
+    rng = random.Random(seed)
+    return ["".join(rng.choice("ab") for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+class TestBatchMatcher:
+
+    def test_ordered_results_match_accepts(self):
+        automaton = nfa.NFA(*random_automaton(1, numStates=15))
+        strings = sample_strings(500)
+        expected = [automaton.accepts(s) for s in strings]
+
+        assert automaton.accepts_many(strings, workers=1) == expected
+        assert automaton.accepts_many(strings, workers=2, chunksize=37) == expected
+        assert automaton.accepts_many(iter(strings), workers=3, chunksize=10, executor="thread") == expected
+
+    def test_unordered_stream_covers_every_string(self):
+        automaton = nfa.NFA(*random_automaton(2, numStates=15))
+        strings = sample_strings(300)
+        expected = [automaton.accepts(s) for s in strings]
+
+        results = dict(batch.iter_accepts_unordered(automaton, (s for s in strings), workers=2, chunksize=16))
+        assert len(results) == len(strings)
+        assert [results[i] for i in range(len(strings))] == expected
+
+    def test_accepts_is_stateless(self):
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2]
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], transitions)
+        automaton.move('a')
+        automaton.move('a')
+        recorded = len(automaton.simulationData.getResults())
+
+        assert automaton.accepts("ab")
+        assert not automaton.accepts("ba")
+        assert automaton.getCurrentStates() == {0, 1, 2}
+        assert len(automaton.simulationData.getResults()) == recorded
+
+    def test_bad_workers_and_chunksize(self):
+        automaton = nfa.NFA(['a'], 1, [0], [0], {})
+        for workers in (1, 2):
+            with pytest.raises(ValueError, match="chunksize"):
+                automaton.accepts_many(["a", "b"], workers=workers, chunksize=0)
+        with pytest.raises(ValueError, match="workers"):
+            automaton.accepts_many(["a"], workers=0)
+        with pytest.raises(ValueError, match="chunksize"):
+            list(batch.iter_accepts_unordered(automaton, ["a"], workers=2, chunksize=-1))
+
+    def test_unknown_executor(self):
+        automaton = nfa.NFA(['a'], 1, [0], [0], {})
+        try:
+            automaton.accepts_many(["a"], workers=2, executor="gpu")
+        except ValueError:
+            pass
+        else:
+            assert False, "expected ValueError"
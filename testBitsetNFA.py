@@ -0,0 +1,68 @@
+# the bitset engine should give exactly the same answers as the set based NFA
+
+import random
+
+import NFA as nfa
+import bitsetNFA as bnfa
+import simulationData as sd
+from sampleAutomata import random_automaton
+
+
+class TestBitsetNFA:
+
+    def test_same_as_set_engine_on_simple_nfa(self):
+        alphabet = ['a', 'b', '#']
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2]
+        }
+        automaton = bnfa.BitsetNFA(alphabet, 3, [0], [2], transitions)
+
+        assert automaton.getCurrentStates() == {0, 2}
+        assert automaton.isAccepted() == True
+        automaton.move('a')
+        assert automaton.getCurrentStates() == {0, 1, 2}
+        automaton.move('b')
+        assert automaton.getCurrentStates() == {2}
+        assert automaton.isAccepted() == True
+
+    def test_same_as_set_engine_on_random_nfas(self):
+        rng = random.Random(7)
+        for seed in range(20):
+            spec = random_automaton(seed)
+            inputString = "".join(rng.choice("ab") for _ in range(30))
+
+            reference = nfa.NFA(*spec)
+            bitset = bnfa.BitsetNFA(*spec)
+            for level in sd.TRACE_LEVELS:
+                reference.processString(inputString, level)
+                bitset.processString(inputString, level)
+
+                assert bitset.getCurrentStates() == reference.getCurrentStates()
+                assert bitset.isAccepted() == reference.isAccepted()
+                assert bitset.simulationData.getResults() == reference.simulationData.getResults()
+
+    def test_slice_tables_span_many_bytes(self):
+        rng = random.Random(3)
+        spec = random_automaton(5, numStates=300)
+        reference = nfa.NFA(*spec)
+        bitset = bnfa.BitsetNFA(*spec)
+        for _ in range(50):
+            states = set(rng.sample(range(300), rng.randint(0, 300)))
+            for symbol in "ab":
+                assert bnfa.maskToStates(bitset.stepMask(bnfa.statesToMask(states), symbol)) == \
+                    reference.step(states, symbol)
+            assert bnfa.maskToStates(bitset.closureMask(bnfa.statesToMask(states))) == \
+                reference.lambdaClosure(states)
+
+    def test_step_mask_folds_lambda_closure(self):
+        transitions = {
+            (0, 'a'): [1],
+            (1, '#'): [2],
+            (2, '#'): [3],
+        }
+        automaton = bnfa.BitsetNFA(['a'], 4, [0], [3], transitions)
+
+        assert bnfa.maskToStates(automaton.stepMask(0b0001, 'a')) == {1, 2, 3}
+        assert automaton.stepMask(0b0001, 'b') == 0
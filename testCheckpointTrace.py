@@ -0,0 +1,67 @@
+# a checkpointed trace should read exactly like the full trace of processString
+
+import random
+
+import NFA as nfa
+import bitsetNFA as bnfa
+import checkpointTrace as ct
+import simulationData as sd
+from sampleAutomata import random_automaton
+
+
+class TestCheckpointTrace:
+
+    def test_same_entries_as_full_trace(self):
+        rng = random.Random(2)
+        for seed in range(6):
+            spec = random_automaton(seed, numStates=15)
+            for engine in (nfa.NFA, bnfa.BitsetNFA):
+                automaton = engine(*spec)
+                inputString = "".join(rng.choice("ab") for _ in range(rng.randint(0, 60)))
+                for level in (sd.TRACE_STEPS, sd.TRACE_FULL):
+                    expected = list(automaton.processString(inputString, level).getResults())
+                    for interval in (1, 4, 7, 100):
+                        trace = ct.CheckpointTrace(automaton, inputString, interval, level)
+                        assert len(trace) == len(expected)
+                        assert list(trace) == expected
+                        # random access in any order
+                        for index in rng.sample(range(len(expected)), min(10, len(expected))):
+                            assert trace[index] == expected[index]
+                        assert trace.isAccepted() == automaton.isAccepted()
+
+    def test_seek_to_step(self):
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2],
+            (1, '#'): [0],
+            (2, '#'): [1]
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], transitions)
+        inputString = "ab" * 500
+        trace = ct.CheckpointTrace(automaton, inputString, interval=64)
+
+        assert len(trace.checkpoints) == (1000 + 63) // 64 + 1
+        for step in (0, 1, 63, 64, 65, 999, 1000):
+            index = trace.entryIndexOfStep(step)
+            entry = trace[index]
+            assert step in entry and entry[step]["symbol"] == (inputString[step - 1] if step else None)
+            assert trace.getStep(step)[-1] == entry
+            assert all(step in e for e in trace.getStep(step))
+            assert trace.configurationAt(step) == entry[step]["toStates"]
+
+        # the level bounds of the derivation tree, without a binary search over the replayed entries
+        expected = list(automaton.processString(inputString, sd.TRACE_FULL).getResults())
+        steps = [next(iter(entry)) for entry in expected]
+        for step in (0, 1, 2, 63, 64, 65, 128, 129, 999, 1000, 1001):
+            assert trace.firstEntryOfStep(step) == next((i for i, s in enumerate(steps) if s >= step), len(steps))
+
+    def test_replays_do_not_touch_the_automaton(self):
+        transitions = {(0, 'a'): [0, 1], (1, 'b'): [2]}
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], transitions)
+        automaton.move('a')
+        before = automaton.getCurrentStates()
+
+        trace = ct.CheckpointTrace(automaton, "aab" * 10, interval=5)
+        trace[17]
+        assert automaton.getCurrentStates() == before
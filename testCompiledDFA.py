@@ -0,0 +1,65 @@
+# the compiled DFA should accept exactly what the NFA accepts
+
+import itertools
+import random
+
+import NFA as nfa
+from sampleAutomata import random_automaton
+
+
+def nfa_accepts(spec, inputString):
+    reference = nfa.NFA(*spec)
+    for symbol in inputString:
+        reference.move(symbol)
+    return reference.isAccepted()
+
+
+class TestCompiledDFA:
+
+    def test_minimizes_redundant_states(self):
+        # (a|b)*b written with two redundant copies of the loop
+        transitions = {
+            (0, 'a'): [0],
+            (0, 'b'): [0, 1],
+            (0, '#'): [2],
+            (2, 'a'): [2],
+            (2, 'b'): [2, 1],
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [1], transitions)
+        matcher = automaton.compile()
+
+        assert matcher.accepts("ab")
+        assert matcher.accepts("b")
+        assert not matcher.accepts("ba")
+        assert not matcher.accepts("")
+        assert not matcher.accepts("abc")
+        assert matcher.getStats()["minimizedStates"] == 2
+        assert matcher.getStats()["subsetStates"] >= 2
+
+    def test_agrees_with_nfa(self):
+        for seed in range(15):
+            spec = random_automaton(seed, numStates=12)
+            matcher = nfa.NFA(*spec).compile()
+            assert matcher.minimizedStates <= matcher.subsetStates
+            for length in range(6):
+                for word in itertools.product("ab", repeat=length):
+                    inputString = "".join(word)
+                    assert matcher.accepts(inputString) == nfa_accepts(spec, inputString), (seed, inputString)
+
+    def test_minimal_dfa_is_canonical(self):
+        rng = random.Random(11)
+        for seed in range(10):
+            spec = random_automaton(seed, numStates=10)
+            once = nfa.NFA(*spec).compile()
+
+            # rebuild an NFA from the minimal DFA and minimize again, nothing should change
+            transitions = {}
+            for state in range(once.minimizedStates):
+                for symbolId, symbol in enumerate(once.alphabet):
+                    transitions[(state, symbol)] = [once.table[state * once.numSymbols + symbolId]]
+            finals = [state for state in range(once.minimizedStates) if once.accepting[state]]
+            twice = nfa.NFA(once.alphabet, once.minimizedStates, [once.startState], finals, transitions).compile()
+
+            assert twice.minimizedStates == once.minimizedStates
+            inputString = "".join(rng.choice("ab") for _ in range(50))
+            assert twice.accepts(inputString) == once.accepts(inputString)
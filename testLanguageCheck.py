@@ -0,0 +1,74 @@
+# the antichain checks against brute force over all short strings
+
+import itertools
+
+import NFA as nfa
+import nfaBench
+import nfaPasses
+from sampleAutomata import random_automaton
+
+
+def language(automaton, maxLength):
+    return {"".join(letters) for length in range(maxLength + 1)
+            for letters in itertools.product("ab", repeat=length) if automaton.accepts("".join(letters))}
+
+
+class TestLanguageCheck:
+
+    def test_emptiness(self):
+        assert nfa.NFA(['a', 'b'], 2, [0], [1], {(0, 'a'): [0]}).is_empty().holds
+        result = nfa.NFA(['a', 'b'], 3, [0], [2], {(0, 'a'): [1], (1, 'b'): [2], (0, '#'): [1]}).is_empty()
+        assert result.holds is False
+        assert result.counterexample == "b"
+
+    def test_inclusion_and_counterexample(self):
+        # (a|b)*a(a|b)^2 is inside "contains an a", not the other way round
+        blowup = nfa.NFA(*nfaBench.subsetBlowup(2))
+        contains_a = nfa.NFA(['a', 'b'], 2, [0], [1], {(0, 'a'): [1], (0, 'b'): [0], (1, 'a'): [1], (1, 'b'): [1]})
+        assert blowup.is_subset_of(contains_a).holds
+        result = contains_a.is_subset_of(blowup)
+        assert result.holds is False
+        assert result.counterexample == "a"
+        assert contains_a.accepts(result.counterexample) and not blowup.accepts(result.counterexample)
+
+    def test_lambda_symbol_only_in_left_alphabet(self):
+        transitions = {(0, '#'): [1], (1, '#'): [2]}
+        left = nfa.NFA(['a', '#'], 3, [0], [2], transitions)
+        right = nfa.NFA(['a'], 3, [0], [2], transitions)
+        assert left.accepts("#") and not right.accepts("#")
+        result = left.is_subset_of(right)
+        assert result.holds is False
+        assert result.counterexample == "#"
+        assert right.is_subset_of(left).holds
+
+    def test_equivalence_after_passes(self):
+        for seed in range(6):
+            automaton = nfa.NFA(*random_automaton(seed, numStates=12))
+            optimized, _ = nfaPasses.optimize(automaton)
+            result = automaton.is_equivalent(optimized)
+            assert result.holds, result
+
+    def test_against_brute_force(self):
+        for seed in range(12):
+            left = nfa.NFA(*random_automaton(seed, numStates=6))
+            right = nfa.NFA(*random_automaton(seed + 100, numStates=6))
+            result = left.is_subset_of(right)
+            difference = language(left, 6) - language(right, 6)
+            if result.holds:
+                assert not difference
+            else:
+                word = result.counterexample
+                assert left.accepts(word) and not right.accepts(word)
+                # breadth first, so the counterexample is as short as they come
+                assert len(word) == min(map(len, difference))
+
+    def test_limit_and_stats(self):
+        big = nfa.NFA(*nfaBench.subsetBlowup(10))
+        same = nfa.NFA(*nfaBench.subsetBlowup(10))
+        result = big.is_equivalent(same, maxStates=5)
+        assert result.holds is None
+        assert result.stats["limitReached"]
+
+        result = big.is_equivalent(same)
+        assert result.holds
+        assert result.stats["pruned"] > 0
@@ -0,0 +1,77 @@
+# the lazy DFA should always agree with the NFA, whatever its cache size and policy
+
+import random
+
+import NFA as nfa
+from sampleAutomata import random_automaton
+
+
+def run_reference(spec, inputString):
+    reference = nfa.NFA(*spec)
+    for symbol in inputString:
+        reference.move(symbol)
+    return reference.getCurrentStates(), reference.isAccepted()
+
+
+class TestLazyDFA:
+
+    def test_memoizes_transitions(self):
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2]
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], transitions)
+        dfa = automaton.lazyDFA()
+
+        assert dfa.accepts("a" * 99 + "b")
+        stats = dfa.getStats()
+        assert stats["steps"] == 100
+        # only a handful of distinct configurations exist, everything else is a cache hit
+        assert stats["misses"] <= 4
+        assert stats["hits"] == 100 - stats["misses"]
+
+        dfa.reset()
+        dfa.move('a')
+        assert dfa.getCurrentStates() == {0, 1, 2}
+        dfa.move('b')
+        assert dfa.getCurrentStates() == {2}
+        assert dfa.isAccepted()
+
+    def test_agrees_with_nfa_under_eviction(self):
+        rng = random.Random(3)
+        for seed in range(10):
+            spec = random_automaton(seed)
+            automaton = nfa.NFA(*spec)
+            for policy in ("flush", "lru"):
+                dfa = automaton.lazyDFA(maxStates=3, policy=policy)
+                for _ in range(5):
+                    inputString = "".join(rng.choice("ab") for _ in range(40))
+                    states, accepted = run_reference(spec, inputString)
+                    final = dfa.run(inputString)
+                    assert final.states == states
+                    assert final.accepting == accepted
+                    assert len(dfa.cache) <= 3
+
+    def test_lru_counts_targets_reached_by_new_edges(self):
+        transitions = {(0, 'a'): [1], (0, 'b'): [2], (2, 'a'): [1], (0, 'c'): [3], (3, 'a'): [4]}
+        dfa = nfa.NFA(['a', 'b', 'c'], 5, [0], [4], transitions).lazyDFA(maxStates=3, policy="lru")
+        start = dfa.startState()
+        a = dfa.addTransition(start, 'a')
+        b = dfa.addTransition(start, 'b')
+        # {1} again, through an edge that isn't memoized yet: it's now the most recently used
+        assert dfa.addTransition(b, 'a') is a
+        c = dfa.addTransition(start, 'c')
+        dfa.addTransition(c, 'a')
+        # the start state and then {2} were the coldest, insertion order (FIFO) would have dropped {1}
+        assert a.live and not b.live and not start.live
+
+    def test_rejects_bad_configuration(self):
+        automaton = nfa.NFA(['a'], 1, [0], [0], {})
+        for kwargs in ({"policy": "random"}, {"maxStates": 0}):
+            try:
+                automaton.lazyDFA(**kwargs)
+            except ValueError:
+                pass
+            else:
+                assert False, f"expected ValueError for {kwargs}"
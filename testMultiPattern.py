@@ -0,0 +1,44 @@
+# the union should report exactly the patterns whose own NFA accepts the string
+
+import random
+
+import NFA as nfa
+import multiPattern as mp
+from sampleAutomata import random_automaton
+
+
+class TestMultiPattern:
+
+    def test_reports_matching_patterns(self):
+        # ends with 'a', contains 'bb', only c's
+        ends_with_a = nfa.NFA(['a', 'b'], 2, [0], [1], {(0, 'a'): [0, 1], (0, 'b'): [0]})
+        contains_bb = nfa.NFA(['a', 'b'], 3, [0], [2], {
+            (0, 'a'): [0], (0, 'b'): [0, 1], (1, 'b'): [2], (2, 'a'): [2], (2, 'b'): [2]})
+        only_c = nfa.NFA(['c'], 1, [0], [0], {(0, 'c'): [0]})
+        tagged = mp.union([ends_with_a, contains_bb, only_c])
+
+        assert tagged.numStates == 6
+        assert tagged.offsets == [0, 2, 5]
+        assert tagged.alphabet == ['a', 'b', 'c']
+
+        assert tagged.matches("abba") == {0, 1}
+        assert tagged.matches("ab") == frozenset()
+        assert tagged.matches("ccc") == {2}
+        assert tagged.matches("") == {2}
+        assert tagged.matchingPatterns("bba") == {0, 1}
+
+        tagged.reset()
+        for symbol in "bb":
+            tagged.move(symbol)
+        assert tagged.getMatchedPatterns() == {1}
+
+    def test_same_as_running_each_pattern(self):
+        patterns = [nfa.NFA(*random_automaton(seed, numStates=8)) for seed in range(5)]
+        tagged = mp.union(patterns, maxStates=16)
+        rng = random.Random(3)
+        for length in range(8):
+            for _ in range(10):
+                s = "".join(rng.choice("ab") for _ in range(length))
+                expected = {i for i, pattern in enumerate(patterns) if pattern.accepts(s)}
+                assert tagged.matches(s) == expected
+                assert tagged.matchingPatterns(s) == expected
@@ -3,6 +3,7 @@
 # initialize an NFA
 
 import NFA as nfa
+import simulationData as sd
 
 class TestNFA:
 
@@ -55,6 +56,198 @@ class TestNFA:
         assert automaton.getCurrentStates() == {2}  # From state 1 with 'b' goes to 2; state 0 has no transition with 'b'
         assert automaton.isAccepted() == True  # State 2 is accepting
 
+    def test_lambda_closure_table(self):
+        alphabet = ['a']
+        numStates = 6
+        startStates = [0]
+        finalStates = [5]
+        # 0 -> 1 -> 2 -> 0 is a lambda cycle, 2 -> 3 -> 4 is a chain leaving it, 5 is only reached by 'a'
+        transitions = {
+            (0, '#'): [1],
+            (1, '#'): [2],
+            (2, '#'): [0, 3],
+            (3, '#'): [4],
+            (4, 'a'): [5],
+        }
+
+        automaton = nfa.NFA(alphabet, numStates, startStates, finalStates, transitions)
+
+        assert automaton.closureTable[0] == {0, 1, 2, 3, 4}
+        assert automaton.closureTable[1] == {0, 1, 2, 3, 4}
+        assert automaton.closureTable[3] == {3, 4}
+        assert automaton.closureTable[5] == {5}
+        assert automaton.getCurrentStates() == {0, 1, 2, 3, 4}
+        assert automaton.isAccepted() == False
+
+        automaton.move('a')
+        assert automaton.getCurrentStates() == {5}
+        assert automaton.isAccepted() == True
+
+    def test_trace_levels(self):
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2]
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], transitions, traceLevel=sd.TRACE_NONE)
+
+        simulation = automaton.processString("aab")
+        assert simulation.getResults() == []
+        assert automaton.getCurrentStates() == {2}
+        assert automaton.isAccepted() == True
+
+        steps = automaton.processString("aab", sd.TRACE_STEPS).getResults()
+        assert len(steps) == 4
+        assert all('symbol' in list(entry.values())[0] for entry in steps)
+
+        # the lambda moves come on top of the steps, and running again starts from scratch
+        full = automaton.processString("aab", sd.TRACE_FULL).getResults()
+        assert len(full) > len(steps)
+        assert automaton.processString("aab", sd.TRACE_FULL).getResults() == full
+        assert automaton.traceLevel == sd.TRACE_NONE
+
+    def test_trace_interns_state_sets(self):
+        transitions = {
+            (0, 'a'): [0],
+            (0, '#'): [1],
+        }
+        automaton = nfa.NFA(['a'], 2, [0], [1], transitions)
+        simulation = automaton.processString("a" * 1000)
+
+        # one empty set for the initial entry and one {0, 1} shared by every step
+        assert len(simulation.stateSets) == 2
+        results = simulation.getResults()
+        assert len(results) == 1001
+        assert results[-1] == {1000: {"symbol": 'a', "fromStates": {0, 1}, "toStates": {0, 1}, "isAccepted": True, "isLampda": False}}
+        assert results[5][5]["toStates"] is results[6][6]["toStates"]
+
+    def test_symbol_tables_and_translation(self):
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2]
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], transitions)
+
+        assert automaton.symbols == ['a', 'b', '#']
+        assert list(automaton.translate("abba")) == [0, 1, 1, 0]
+        assert automaton.successorTable[0 * automaton.numSymbols + 0] == {0, 1, 2}
+
+        for bad in ("abc", "a#", "aλ"):
+            try:
+                automaton.processString(bad)
+            except ValueError as e:
+                assert "not in alphabet" in str(e)
+            else:
+                assert False, f"expected ValueError for {bad!r}"
+
+        # '#' is a valid input symbol only when it is part of the alphabet
+        withLambda = nfa.NFA(['a', 'b', '#'], 3, [0], [2], transitions)
+        assert list(withLambda.translate("a#")) == [0, 2]
+        assert list(automaton.translate("acb", strict=False)) == [0, -1, 1]
+
+    def test_unknown_symbols_reject_in_every_matcher(self):
+        import bitsetNFA
+        import multiPattern
+        import prefixCache
+        import streamMatcher
+
+        # '#' is not in the alphabet, but the states reached after 'b' have a '#' edge into the final state
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2, 3],
+            (0, '#'): [2],
+            (2, 'a'): [2],
+            (3, '#'): [4],
+            (4, 'a'): [4]
+        }
+        spec = (['a', 'b'], 5, [0], [2, 4], transitions)
+        automaton = nfa.NFA(*spec)
+        strings = ["ab", "abc", "c", "", "aλ", "ab#", "aba", "ba", "a#", "#", "ab#a"]
+        expected = [True, False, False, True, False, False, True, False, False, False, False]
+
+        assert [automaton.accepts(s) for s in strings] == expected
+        assert [bitsetNFA.BitsetNFA(*spec).accepts(s) for s in strings] == expected
+        assert [automaton.lazyDFA().accepts(s) for s in strings] == expected
+        assert [automaton.compile().accepts(s) for s in strings] == expected
+        assert automaton.accepts_many(strings, workers=1) == expected
+        assert [prefixCache.PrefixCache(automaton).accepts(s) for s in strings] == expected
+
+        stream = streamMatcher.StreamMatcher(automaton)
+        results = []
+        for s in strings:
+            stream.reset()
+            stream.feed(s)
+            results.append(stream.finish())
+        assert results == expected
+
+        tagged = multiPattern.union([automaton])
+        assert [bool(tagged.matches(s)) for s in strings] == expected
+        assert [bool(tagged.matchingPatterns(s)) for s in strings] == expected
+
+        # the step by step APIs keep refusing them, a trace has no step for the symbol
+        try:
+            automaton.processString("abc")
+        except ValueError as e:
+            assert "not in alphabet" in str(e)
+        else:
+            assert False, "expected ValueError"
+
+    def test_cancel_and_progress(self):
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2]
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], transitions)
+
+        progress = []
+        simulation = automaton.processString("a" * 25 + "b", onProgress=lambda done, total: progress.append(done), progressEvery=10)
+        assert progress == [10, 20, 26]
+        assert simulation.getResults() == automaton.processString("a" * 25 + "b").getResults()
+
+        class StopAfter:
+            def __init__(self, checks):
+                self.checks = checks
+
+            def is_set(self):
+                self.checks -= 1
+                return self.checks < 0
+
+        try:
+            automaton.processString("a" * 100, cancelEvent=StopAfter(5))
+        except nfa.SimulationCancelled:
+            pass
+        else:
+            assert False, "expected SimulationCancelled"
+        # the symbols before the cancel are in the trace
+        assert len(automaton.simulationData.getResults()) == 6
+
+    def test_early_decision(self):
+        # a then anything is accepted (state 1 loops on everything), b first is dead
+        transitions = {
+            (0, 'a'): [1],
+            (0, 'b'): [2],
+            (1, 'a'): [1],
+            (1, 'b'): [1],
+            (2, 'a'): [2],
+        }
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [1], transitions)
+
+        assert automaton.decide("abab" * 100) == (True, 1)
+        assert automaton.decide("baba" * 100) == (False, 1)
+        assert automaton.decide("") == (False, 0)
+        assert automaton.liveStates == {0, 1}
+        assert automaton.universalStates == {1}
+
+        assert automaton.firstAcceptingPrefix("bbbb") == -1
+        assert automaton.firstAcceptingPrefix("abbb") == 1
+
+        automaton.processString("b" + "a" * 50, sd.TRACE_NONE)
+        assert automaton.getCurrentStates() == {2}
+        automaton.processString("bb" + "a" * 50, sd.TRACE_NONE)
+        assert automaton.getCurrentStates() == frozenset()
+
 def test_nfa_with_string(input_string, expected_states, expected_acceptance):
     alphabet = ['a', 'b', '#']
     numStates = 3
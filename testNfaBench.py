@@ -0,0 +1,45 @@
+# the generators should build the languages they promise, and a tiny run should produce the JSON report
+
+import itertools
+import json
+
+import NFA as nfa
+import nfaBench
+import simulationData as sd
+
+
+class TestNfaBench:
+
+    def test_subset_blowup_language(self):
+        k = 3
+        automaton = nfa.NFA(*nfaBench.subsetBlowup(k))
+        for length in range(8):
+            for letters in itertools.product("ab", repeat=length):
+                s = "".join(letters)
+                assert automaton.accepts(s) == (len(s) > k and s[-k - 1] == 'a')
+        assert automaton.compile().minimizedStates == 2 ** (k + 1)
+
+    def test_lambda_generators(self):
+        chain = nfa.NFA(*nfaBench.lambdaChain(10))
+        assert chain.closureTable[0] == frozenset(range(10))
+        assert chain.closureTable[9] == {9}
+        cycle = nfa.NFA(*nfaBench.lambdaCycle(10))
+        assert all(closure == frozenset(range(10)) for closure in cycle.closureTable)
+
+    def test_report(self, tmp_path):
+        out = tmp_path / "bench.json"
+        case = nfaBench.benchCase("fanOut", {"width": 5}, nfaBench.fanOut(5), 50, repeat=1, samples=20)
+        assert set(case["levels"]) == {"none", "steps", "full"}
+        assert case["levels"]["full"]["peakBytes"] > 0
+        assert case["getResults"]["entries"] >= 51
+        assert set(case["engines"]) == {"set", "bitset", "lazyDFA"}
+
+        empty = nfaBench.benchCase("fanOut", {"width": 5}, nfaBench.fanOut(5), 0, repeat=1)
+        assert empty["levels"]["none"]["p50Ns"] is None
+        automaton = nfa.NFA(*nfaBench.fanOut(5))
+        assert nfaBench.stepLatencies(automaton, "abab", sd.TRACE_FULL, 0)["maxNs"] is None
+
+        assert nfaBench.main(["--quick", "--repeat", "1", "-o", str(out)]) == 0
+        report = json.loads(out.read_text())
+        assert {result["name"] for result in report["results"]} == {
+            "random", "lambdaChain", "lambdaCycle", "subsetBlowup", "fanOut"}
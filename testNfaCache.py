@@ -0,0 +1,100 @@
+# an automaton loaded from the cache should behave exactly like the one parsed from the spec
+
+import os
+import random
+
+import batchMatcher
+import bitsetNFA
+import nfaCache
+import nfaCli
+import nfaSpec
+import shardedScan
+from sampleAutomata import SPEC
+
+
+def spec_text(seed, numStates=15):
+    rng = random.Random(seed)
+    lines = ["alphabet: a,b", f"states: {numStates}", "start: 0",
+             f"final: {','.join(map(str, rng.sample(range(numStates), 3)))}", "transitions:"]
+    for state in range(numStates):
+        for symbol in "ab#":
+            if rng.random() < (0.2 if symbol == '#' else 0.6):
+                targets = rng.sample(range(numStates), rng.randint(1, 3))
+                lines.append(",".join([str(state), symbol] + list(map(str, targets))))
+    return "\n".join(lines) + "\n"
+
+
+class TestNfaCache:
+
+    def test_round_trip(self, tmp_path):
+        rng = random.Random(2)
+        for seed in range(5):
+            spec = tmp_path / f"spec{seed}.txt"
+            spec.write_text(spec_text(seed))
+            reference = nfaSpec.load_spec(str(spec))
+
+            first, firstDfa = nfaCache.loadSpec(str(spec), str(tmp_path / "cache"), compile=True)
+            cached, dfa = nfaCache.loadSpec(str(spec), str(tmp_path / "cache"), compile=True)
+            assert isinstance(cached, nfaCache.CachedNFA)
+            assert isinstance(dfa.table, memoryview)
+            assert cached.transitions == reference.transitions
+            assert cached.closureTable == reference.closureTable
+            assert cached.targetTable == reference.targetTable
+            assert cached.successorTable == reference.successorTable
+            assert cached.startStates == reference.startStates
+            assert cached.finalStates == reference.finalStates
+            for _ in range(30):
+                s = "".join(rng.choice("ab") for _ in range(rng.randint(0, 10)))
+                assert cached.accepts(s) == reference.accepts(s) == dfa.accepts(s) == firstDfa.accepts(s)
+
+    def test_workers_map_the_cache_file(self, tmp_path):
+        spec = tmp_path / "spec.txt"
+        spec.write_text(spec_text(7, numStates=20))
+        reference = nfaSpec.load_spec(str(spec))
+        nfaCache.loadSpec(str(spec), str(tmp_path / "cache"))
+        cached, _ = nfaCache.loadSpec(str(spec), str(tmp_path / "cache"))
+        assert batchMatcher.automatonSpec(cached) == (cached.cachePath,)
+        assert isinstance(batchMatcher.buildAutomaton((cached.cachePath,), bitsetNFA.BitsetNFA),
+                          nfaCache.CachedBitsetNFA)
+
+        rng = random.Random(3)
+        strings = ["".join(rng.choice("ab") for _ in range(rng.randint(0, 12))) for _ in range(200)]
+        assert cached.accepts_many(strings, workers=2, chunksize=25) == [reference.accepts(s) for s in strings]
+        s = "".join(rng.choice("ab") for _ in range(3000))
+        result = shardedScan.scanString(cached, s, workers=2, chunkSize=500)
+        reference.processString(s)
+        assert result.states == reference.getCurrentStates()
+
+    def test_key_follows_content(self, tmp_path):
+        spec = tmp_path / "spec.txt"
+        spec.write_text(SPEC)
+        cache = tmp_path / "cache"
+        nfaCache.loadSpec(str(spec), str(cache))
+        nfaCache.loadSpec(str(spec), str(cache))
+        assert len(os.listdir(cache)) == 1
+
+        spec.write_text(SPEC.replace("final: 2", "final: 1"))
+        automaton, dfa = nfaCache.loadSpec(str(spec), str(cache))
+        assert dfa is None
+        assert automaton.finalStates == [1]
+        assert len(os.listdir(cache)) == 2
+
+    def test_bad_file_is_rebuilt(self, tmp_path):
+        spec = tmp_path / "spec.txt"
+        spec.write_text(SPEC)
+        cache = tmp_path / "cache"
+        cache.mkdir()
+        (cache / (nfaCache.specKey(SPEC) + ".nfac")).write_bytes(b"garbage")
+        automaton, _ = nfaCache.loadSpec(str(spec), str(cache))
+        assert automaton.accepts("ab")
+        assert nfaCache.load(str(cache / (nfaCache.specKey(SPEC) + ".nfac")))[0].accepts("ab")
+
+    def test_cli_cache_dir(self, tmp_path):
+        spec = tmp_path / "spec.txt"
+        spec.write_text(SPEC)
+        inputs = tmp_path / "inputs.txt"
+        inputs.write_text("ab\nba\n")
+        out = tmp_path / "out.txt"
+        for _ in range(2):
+            assert nfaCli.main([str(spec), str(inputs), "-o", str(out), "--cache-dir", str(tmp_path / "cache")]) == 0
+            assert out.read_text() == "ab\taccepted\nba\trejected\n"
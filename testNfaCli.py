@@ -0,0 +1,74 @@
+# the command line tool, run in-process on temporary files (and once in a fresh interpreter)
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+import nfaCli
+import nfaSpec
+from sampleAutomata import SPEC
+
+
+@pytest.fixture
+def files(tmp_path):
+    spec = tmp_path / "spec.txt"
+    spec.write_text(SPEC)
+    inputs = tmp_path / "inputs.txt"
+    inputs.write_text("ab\nabc\n\nba\na#\n")
+    return spec, inputs, tmp_path / "out.txt"
+
+
+class TestNfaSpec:
+
+    def test_parse_spec(self):
+        automaton = nfaSpec.parse_spec(SPEC)
+        assert automaton.alphabet == ['a', 'b']
+        assert automaton.numStates == 3
+        assert automaton.transitions == {(0, 'a'): [0, 1], (1, 'b'): [2], (0, '#'): [2]}
+
+    def test_validation(self):
+        with pytest.raises(ValueError, match="out of range"):
+            nfaSpec.parse_spec(SPEC.replace("final: 2", "final: 3"))
+        with pytest.raises(ValueError, match="not in alphabet"):
+            nfaSpec.parse_spec(SPEC + "1,c,2\n")
+        with pytest.raises(ValueError, match="no 'start:'"):
+            nfaSpec.parse_spec(SPEC.replace("start: 0\n", ""))
+
+
+class TestNfaCli:
+
+    @pytest.mark.parametrize("engine", ["lazy", "nfa"])
+    def test_tsv(self, files, engine):
+        spec, inputs, out = files
+        assert nfaCli.main([str(spec), str(inputs), "-o", str(out), "--engine", engine]) == 0
+        lines = out.read_text().splitlines()
+        assert lines[0] == "ab\taccepted"
+        # a symbol outside the alphabet rejects the line, whichever engine runs it
+        assert lines[1] == "abc\trejected"
+        assert lines[2] == "\taccepted"
+        assert lines[3] == "ba\trejected"
+        # '#' is not in the alphabet, even though state 0 has a '#' edge to the final state
+        assert lines[4] == "a#\trejected"
+
+    def test_jsonl_trace(self, files):
+        spec, inputs, out = files
+        assert nfaCli.main([str(spec), str(inputs), "-o", str(out), "--format", "jsonl", "--trace"]) == 0
+        records = [json.loads(line) for line in out.read_text().splitlines()]
+        assert records[0] == {"input": "ab", "accepted": True, "trace": [[0, 2], [0, 1, 2], [2]]}
+        # a trace has no step for the unknown symbol, so that one is still an error
+        assert "error" in records[1]
+
+    def test_bad_spec(self, tmp_path):
+        spec = tmp_path / "spec.txt"
+        spec.write_text("alphabet: a\n")
+        assert nfaCli.main([str(spec)]) == 2
+
+    def test_no_tkinter(self, files):
+        spec, inputs, _ = files
+        code = ("import sys, nfaCli; nfaCli.main(sys.argv[1:]); "
+                "assert 'tkinter' not in sys.modules")
+        result = subprocess.run([sys.executable, "-c", code, str(spec)], input="ab\n",
+                                capture_output=True, text=True, check=True)
+        assert result.stdout == "ab\taccepted\n"
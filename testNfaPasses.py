@@ -0,0 +1,52 @@
+# every optimization pass should keep the language of the automaton
+
+import itertools
+
+import NFA as nfa
+import nfaPasses
+from sampleAutomata import random_automaton
+
+
+def same_language(first, second, maxLength=6):
+    for length in range(maxLength + 1):
+        for word in itertools.product("ab", repeat=length):
+            inputString = "".join(word)
+            if first.accepts(inputString) != second.accepts(inputString):
+                return False
+    return True
+
+
+class TestNfaPasses:
+
+    def test_passes_keep_the_language(self):
+        for seed in range(15):
+            automaton = nfa.NFA(*random_automaton(seed, numStates=12))
+            for optimizationPass in nfaPasses.DEFAULT_PASSES:
+                result, report = optimizationPass(automaton)
+                assert same_language(automaton, result), (seed, report)
+            optimized, reports = nfaPasses.optimize(automaton)
+            assert same_language(automaton, optimized)
+            assert [r.name for r in reports] == ["removeLambda", "trim", "renumber"]
+
+    def test_lambda_chain_and_useless_states(self):
+        # 0 -#-> 1 -#-> 2 -a-> 3 (final), 4 is unreachable and 5 can never reach a final state
+        transitions = {
+            (0, '#'): [1],
+            (1, '#'): [2],
+            (2, 'a'): [3, 5],
+            (4, 'a'): [3],
+            (5, 'b'): [5],
+        }
+        automaton = nfa.NFA(['a', 'b'], 6, [0], [3], transitions)
+        optimized, reports = nfaPasses.optimize(automaton)
+
+        assert all(symbol != '#' for (_, symbol) in optimized.transitions)
+        assert optimized.numStates == 2
+        assert optimized.startStates == [0]
+        assert optimized.transitions == {(0, 'a'): [1]}
+        assert optimized.finalStates == [1]
+        # folding the closure copies the 'a' edges of 2 onto 0 and 1
+        assert (reports[0].transitionsBefore, reports[0].transitionsAfter) == (6, 8)
+        assert reports[1].statesRemoved() == 4
+        assert reports[2].statesRemoved() == 0
+        assert same_language(automaton, optimized)
@@ -0,0 +1,149 @@
+# the server runs on localhost inside the test, clients talk to it over real sockets
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+import nfaServer
+import nfaSpec
+import simulationData as sd
+from sampleAutomata import SPEC
+
+
+def automata():
+    ends_with_b = nfaSpec.parse_spec(SPEC, sd.TRACE_NONE)
+    only_a = nfaSpec.parse_spec("alphabet: a\nstates: 1\nstart: 0\nfinal: 0\ntransitions:\n0,a,0\n", sd.TRACE_NONE)
+    return {"spec": ends_with_b, "onlyA": only_a}
+
+
+async def ask(host, port, requests):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"".join(json.dumps(request).encode() + b"\n" for request in requests))
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in requests]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+class TestNfaServer:
+
+    def test_answers_and_coalesces(self):
+        async def scenario():
+            server = nfaServer.MatchServer(automata(), window=0.01, maxBatch=64)
+            await server.start()
+            host, port = server.address()[:2]
+            try:
+                requests = [{"id": i, "automaton": "spec", "input": "ab" if i % 2 else "ba"} for i in range(40)]
+                requests += [{"id": "a", "automaton": "onlyA", "input": "aaa"},
+                             {"id": "b", "automaton": "onlyA", "input": "ab"},
+                             {"id": "c", "automaton": "missing", "input": ""}]
+                answers = await asyncio.gather(*[ask(host, port, requests) for _ in range(5)])
+                stats = (await ask(host, port, [{"id": 0, "op": "stats"}]))[0]["stats"]
+            finally:
+                await server.close()
+            return answers, stats
+
+        answers, stats = asyncio.run(scenario())
+        for responses in answers:
+            assert [response["id"] for response in responses[:40]] == list(range(40))
+            assert all(response["accepted"] == bool(response["id"] % 2) for response in responses[:40])
+            assert responses[40] == {"id": "a", "accepted": True}
+            assert responses[41] == {"id": "b", "accepted": False}
+            assert "Unknown automaton" in responses[42]["error"]
+
+        assert stats["requests"] == 5 * 42
+        # 210 requests arriving together don't need anywhere near 210 passes
+        assert stats["batches"] < 50
+        assert stats["meanBatch"] > 4
+        assert stats["p99Ms"] >= stats["p50Ms"] >= 0
+
+    def test_max_batch_and_backpressure(self):
+        async def scenario():
+            server = nfaServer.MatchServer({"spec": automata()["spec"]}, window=0.05, maxBatch=4, maxPending=8)
+            await server.start()
+            host, port = server.address()[:2]
+            try:
+                requests = [{"id": i, "input": "ab"} for i in range(100)]
+                responses = await ask(host, port, requests)
+            finally:
+                await server.close()
+            return server, responses
+
+        server, responses = asyncio.run(scenario())
+        assert all(response["accepted"] for response in responses)
+        assert server.batched == 100
+        assert server.batches >= 25
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets only")
+    def test_unix_socket(self, tmp_path):
+        async def scenario():
+            path = str(tmp_path / "nfa.sock")
+            server = nfaServer.MatchServer({"spec": automata()["spec"]})
+            await server.start(path=path)
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write(b'{"id": 7, "input": "ab"}\nnot json\n')
+                first, second = json.loads(await reader.readline()), json.loads(await reader.readline())
+                writer.close()
+            finally:
+                await server.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == {"id": 7, "accepted": True}
+        assert second["error"].startswith("Bad request")
+
+    def test_line_too_long(self):
+        async def scenario():
+            server = nfaServer.MatchServer({"spec": automata()["spec"]}, lineLimit=1024)
+            await server.start()
+            host, port = server.address()[:2]
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                long_request = json.dumps({"id": 1, "input": "ab" * 35000}).encode()
+                writer.write(long_request + b'\n{"id": 2, "input": "ab"}\n')
+                await writer.drain()
+                first = json.loads(await asyncio.wait_for(reader.readline(), 5))
+                second = json.loads(await asyncio.wait_for(reader.readline(), 5))
+                writer.close()
+            finally:
+                await server.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == {"id": None, "error": "Bad request: line too long"}
+        assert second == {"id": 2, "accepted": True}
+
+    def test_stops_reading_when_the_client_is_gone(self):
+        class BrokenWriter:
+            closed = False
+
+            def write(self, data):
+                pass
+
+            async def drain(self):
+                raise ConnectionResetError()
+
+            def close(self):
+                self.closed = True
+
+            def is_closing(self):
+                return self.closed
+
+        async def scenario():
+            server = nfaServer.MatchServer({"spec": automata()["spec"]}, maxInFlight=2)
+            await server.start()
+            try:
+                reader = asyncio.StreamReader()
+                reader.feed_data(b"".join(b'{"id": %d, "input": "ab"}\n' % i for i in range(50)))
+                writer = BrokenWriter()
+                # with the reader stuck on a full response queue this would never return
+                await asyncio.wait_for(server.handleConnection(reader, writer), 5)
+            finally:
+                await server.close()
+            return writer
+
+        assert asyncio.run(scenario()).closed
@@ -0,0 +1,65 @@
+# instrumentation should count what the engine does and leave no trace once it's turned off
+
+import NFA as nfa
+import bitsetNFA as bnfa
+import simulationData as sd
+from sampleAutomata import random_automaton
+
+
+def simple_transitions():
+    return {
+        (0, 'a'): [0, 1],
+        (1, 'b'): [2],
+        (0, '#'): [2]
+    }
+
+
+class TestNfaStats:
+
+    def test_counters(self):
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], simple_transitions(), traceLevel=sd.TRACE_FULL)
+        stats = automaton.enableStats()
+        seen = []
+        stats.addHook(lambda s: seen.append(s.moves))
+        automaton.processString("ab")
+
+        # a: 0 -> {0, 1}, closure adds 2. b: 1 -> {2}
+        assert stats.moves == 2
+        assert stats.runs == 1
+        assert stats.transitionsFired == 3
+        assert stats.closureExpansions == 1
+        assert stats.lambdaEdges == 1
+        assert stats.maxActive == 3
+        assert stats.meanActive() == 2
+        assert stats.phaseCalls["move"] == 2
+        # the start configuration and both symbols
+        assert stats.phaseCalls["recordMove"] == 3
+        # the closure of the start states on reset, and 'a' adding 2
+        assert stats.phaseCalls["recordLambdaMove"] == 2
+        assert stats.phaseCalls["lambdaClosure"] == 3
+        assert seen == [2]
+        assert automaton.simulationData.getResults() == nfa.NFA(
+            ['a', 'b'], 3, [0], [2], simple_transitions(), traceLevel=sd.TRACE_FULL).processString("ab").getResults()
+
+    def test_disable_restores_class_methods(self):
+        automaton = nfa.NFA(['a', 'b'], 3, [0], [2], simple_transitions())
+        automaton.enableStats()
+        automaton.disableStats()
+        assert "moveId" not in vars(automaton)
+        assert "reset" not in vars(automaton)
+        assert automaton.moveId.__func__ is nfa.NFA.moveId
+        automaton.processString("ab")
+        assert not hasattr(automaton, "stats")
+
+    def test_same_results_on_every_engine(self):
+        spec = random_automaton(5, numStates=20)
+        for engineClass in (nfa.NFA, bnfa.BitsetNFA):
+            for level in sd.TRACE_LEVELS:
+                plain = engineClass(*spec, traceLevel=level)
+                counted = engineClass(*spec, traceLevel=level)
+                stats = counted.enableStats()
+                plain.processString("abbaab")
+                counted.processString("abbaab")
+                assert counted.getCurrentStates() == plain.getCurrentStates()
+                # TRACE_NONE stops as soon as no state is left
+                assert stats.moves == 6 or (level == sd.TRACE_NONE and not plain.getCurrentStates())
@@ -0,0 +1,55 @@
+# the NumPy backend is optional, these tests only run when numpy is installed
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import NFA as nfa
+import numpyNFA
+from sampleAutomata import random_automaton
+
+
+class TestNumpyNFA:
+
+    def test_step_by_step(self):
+        transitions = {
+            (0, 'a'): [0, 1],
+            (1, 'b'): [2],
+            (0, '#'): [2]
+        }
+        backend = numpyNFA.NumpyNFA(nfa.NFA(['a', 'b', '#'], 3, [0], [2], transitions))
+
+        assert backend.getCurrentStates() == {0, 2}
+        backend.move('a')
+        assert backend.getCurrentStates() == {0, 1, 2}
+        backend.move('b')
+        assert backend.getCurrentStates() == {2}
+        assert backend.isAccepted()
+        backend.move('c')
+        assert backend.getCurrentStates() == frozenset()
+
+    def test_batch_matches_nfa(self):
+        rng = random.Random(4)
+        for seed in range(10):
+            automaton = nfa.NFA(*random_automaton(seed, numStates=30))
+            backend = numpyNFA.NumpyNFA(automaton)
+            strings = ["".join(rng.choice("abc") for _ in range(rng.randint(0, 20))) for _ in range(50)]
+
+            expected = [automaton.accepts(s) for s in strings]
+            assert backend.acceptsBatch(strings).tolist() == expected
+            assert [backend.accepts(s) for s in strings] == expected
+
+            configurations = backend.runBatch(strings)
+            for row, inputString in enumerate(strings):
+                # processString refuses 'c', moving one symbol at a time takes it like the backend does
+                automaton.reset()
+                for symbol in inputString:
+                    automaton.move(symbol)
+                assert set(np.flatnonzero(configurations[row]).tolist()) == automaton.getCurrentStates()
+
+    def test_empty_batch(self):
+        backend = numpyNFA.NumpyNFA(nfa.NFA(['a'], 1, [0], [0], {}))
+        assert backend.acceptsBatch([]).tolist() == []
+        assert backend.acceptsBatch([""]).tolist() == [True]
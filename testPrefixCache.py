@@ -0,0 +1,46 @@
+# resuming from a cached prefix should give the same configuration as a fresh run
+
+import random
+
+import NFA as nfa
+import simulationData as sd
+from sampleAutomata import random_automaton
+
+
+class TestPrefixCache:
+
+    def test_resumes_from_longest_prefix(self):
+        automaton = nfa.NFA(*random_automaton(1, numStates=12))
+        cache = automaton.enablePrefixCache()
+
+        assert cache.run("abab") == automaton.step(automaton.step(automaton.step(automaton.step(
+            automaton.startConfiguration(), 'a'), 'b'), 'a'), 'b')
+        assert cache.getStats()["misses"] == 4
+        cache.run("ababba")
+        stats = cache.getStats()
+        assert stats["hits"] == 4
+        assert stats["misses"] == 6
+        assert len(cache) == 6
+
+    def test_same_as_processString(self):
+        spec = random_automaton(4, numStates=20)
+        reference = nfa.NFA(*spec)
+        automaton = nfa.NFA(*spec, traceLevel=sd.TRACE_NONE)
+        cache = automaton.enablePrefixCache(maxNodes=30, maxDepth=8)
+        rng = random.Random(9)
+        for _ in range(200):
+            s = "".join(rng.choice("ab") for _ in range(rng.randint(0, 12)))
+            reference.processString(s)
+            automaton.processString(s)
+            assert automaton.getCurrentStates() == reference.getCurrentStates()
+            assert automaton.isAccepted() == reference.isAccepted()
+            assert len(cache) <= 30
+
+        assert cache.getStats()["evictions"] > 0
+        # the eviction never leaves a node cut off from the root
+        stack, reachable = [cache.root], 0
+        while stack:
+            node = stack.pop()
+            reachable += 1
+            stack.extend(node.children.values())
+        assert reachable - 1 == len(cache)
@@ -0,0 +1,66 @@
+# a sharded scan should end in the same configuration as processString, however the input is cut
+
+import random
+
+import pytest
+
+import NFA as nfa
+import bitsetNFA as bnfa
+import shardedScan as sharded
+import simulationData as sd
+from sampleAutomata import random_automaton
+
+
+def reference(spec, inputString):
+    automaton = nfa.NFA(*spec, traceLevel=sd.TRACE_NONE)
+    automaton.processString(inputString)
+    return automaton.getCurrentStates(), automaton.isAccepted()
+
+
+class TestShardedScan:
+
+    def test_relations_compose(self):
+        spec = random_automaton(3, numStates=15)
+        engine = bnfa.BitsetNFA(*spec, traceLevel=sd.TRACE_NONE)
+        first = sharded.transferRelation(engine, engine.translate("abba"))
+        second = sharded.transferRelation(engine, engine.translate("bab"))
+        whole = sharded.transferRelation(engine, engine.translate("abbabab"))
+        assert sharded.composeRelations(first, second) == whole
+
+    @pytest.mark.parametrize("chunkSize", [1, 7, 64, 1000])
+    def test_same_as_processString_inline(self, chunkSize):
+        rng = random.Random(chunkSize)
+        for seed in range(4):
+            spec = random_automaton(seed, numStates=20)
+            s = "".join(rng.choice("ab") for _ in range(300))
+            result = sharded.scanString(nfa.NFA(*spec), s, workers=1, chunkSize=chunkSize)
+            assert (result.states, result.accepted) == reference(spec, s)
+
+    def test_file_with_processes(self, tmp_path):
+        spec = (['a', 'é'], 3, [0], [2], {(0, 'a'): [0, 1], (0, 'é'): [0], (1, 'é'): [2], (2, '#'): [0]})
+        rng = random.Random(1)
+        s = "".join(rng.choice("aé") for _ in range(5000)) + "aé"
+        path = tmp_path / "input.txt"
+        path.write_text(s, encoding="utf-8")
+
+        result = sharded.scanFile(nfa.NFA(*spec), str(path), workers=2, chunkSize=501)
+        assert result.chunks > 10
+        assert (result.states, result.accepted) == reference(spec, s)
+
+    def test_file_encodings(self, tmp_path):
+        spec = (['a', 'é'], 3, [0], [2], {(0, 'a'): [0, 1], (0, 'é'): [0], (1, 'é'): [2], (2, '#'): [0]})
+        s = "aé" * 300
+        path = tmp_path / "input.txt"
+        path.write_text(s, encoding="latin-1")
+        result = sharded.scanFile(nfa.NFA(*spec), str(path), workers=1, chunkSize=7, encoding="latin-1")
+        assert (result.states, result.accepted) == reference(spec, s)
+
+        # a cut could fall inside a UTF-16 code unit or a Shift JIS character
+        for encoding in ("utf-16", "shift_jis"):
+            path.write_text("a" * 20, encoding=encoding)
+            with pytest.raises(ValueError, match="single byte"):
+                sharded.scanFile(nfa.NFA(*spec), str(path), workers=1, chunkSize=7, encoding=encoding)
+
+    def test_unknown_symbol(self):
+        with pytest.raises(ValueError):
+            sharded.scanString(nfa.NFA(*random_automaton(1)), "abc", workers=1)
@@ -0,0 +1,70 @@
+# the streaming matcher should reach the same verdict as processString however the input is split
+
+import io
+import random
+
+import NFA as nfa
+import simulationData as sd
+import streamMatcher as stream
+from sampleAutomata import random_automaton
+
+
+def sample_automaton():
+    # accepts every string ending with "ab"
+    transitions = {
+        (0, 'a'): [0, 1],
+        (0, 'b'): [0],
+        (1, 'b'): [2],
+    }
+    return nfa.NFA(['a', 'b'], 3, [0], [2], transitions)
+
+
+class TestStreamMatcher:
+
+    def test_chunks_match_process_string(self):
+        rng = random.Random(9)
+        for seed in range(10):
+            automaton = nfa.NFA(*random_automaton(seed, numStates=20))
+            matcher = stream.StreamMatcher(automaton)
+            for _ in range(5):
+                inputString = "".join(rng.choice("ab") for _ in range(200))
+                automaton.processString(inputString, sd.TRACE_NONE)
+
+                matcher.reset()
+                position = 0
+                while position < len(inputString):
+                    size = rng.randint(1, 30)
+                    matcher.feed(inputString[position:position + size])
+                    position += size
+                assert matcher.finish() == automaton.isAccepted()
+                assert matcher.getCurrentStates() == automaton.getCurrentStates()
+
+    def test_accepting_offsets(self):
+        seen = []
+        matcher = stream.StreamMatcher(sample_automaton(), reportOffsets=True, onAccept=seen.append)
+
+        assert matcher.scan(iter(["aab", "bab", "ab"]))
+        assert matcher.acceptOffsets == [3, 6, 8]
+        assert seen == [3, 6, 8]
+
+    def test_binary_sources(self, tmp_path):
+        matcher = stream.StreamMatcher(sample_automaton())
+        data = b"ab" * 10000 + b"b"
+
+        assert not matcher.scan(io.BytesIO(data), chunkSize=777)
+        assert matcher.scan(data[:-1])
+
+        path = tmp_path / "input.txt"
+        path.write_bytes(data[:-1])
+        assert matcher.scanFile(path, chunkSize=1000)
+        path.write_bytes(b"")
+        assert not matcher.scanFile(path)
+
+    def test_split_multibyte_characters(self):
+        automaton = nfa.NFA(['é'], 2, [0], [1], {(0, 'é'): [1]})
+        matcher = stream.StreamMatcher(automaton)
+        encoded = "é".encode("utf-8")
+
+        matcher.feed(encoded[:1])
+        matcher.feed(encoded[1:])
+        assert matcher.finish()
@@ -0,0 +1,109 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from collections.abc import Callable, Sequence
+
+
+# a log view that only formats the rows currently on screen.
+# the rows come from any sequence (like SimulationData.getResults()) and are turned into text by
+# formatter when they scroll into view, followed by a few plain message lines (like the verdict).
+# the Text widget never holds more than one screen of lines, whatever the length of the run
+class VirtualLog(tk.Frame):
+    def __init__(self, master, formatter: Callable[[object], str], width=60, height=12, **textOptions):
+        super().__init__(master)
+        self.formatter = formatter
+        self.rows: Sequence = []
+        self.messages: list[str] = []
+        self.top = 0
+        self.visible_rows = height
+        self.highlighted = -1
+
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.text = tk.Text(self, width=width, height=height, wrap=tk.NONE, state=tk.DISABLED, **textOptions)
+        self.text.tag_config("highlight", background="#fff3cd", foreground="black")
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        self.line_height = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+        self.text.bind("<Configure>", self.on_resize)
+        self.text.bind("<MouseWheel>", self.on_wheel)
+        self.text.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.text.bind("<Button-5>", lambda event: self.scroll_by(3))
+
+    def __len__(self):
+        return len(self.rows) + len(self.messages)
+
+    def line(self, index: int) -> str:
+        if index < len(self.rows):
+            return self.formatter(self.rows[index])
+        return self.messages[index - len(self.rows)]
+
+    def clear(self):
+        self.rows = []
+        self.messages = []
+        self.top = 0
+        self.highlighted = -1
+        self.render()
+
+    def set_rows(self, rows: Sequence):
+        self.rows = rows
+        self.messages = []
+        self.top = 0
+        self.highlighted = -1
+        self.render()
+
+    # plain text line after the rows, shown at the end of the log
+    def add_message(self, message: str):
+        self.messages.append(message)
+        self.see(len(self) - 1)
+
+    def max_top(self) -> int:
+        return max(len(self) - self.visible_rows, 0)
+
+    def scroll_to(self, top: int):
+        self.top = min(max(top, 0), self.max_top())
+        self.render()
+
+    def scroll_by(self, rows: int):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    # scrolls just enough for the row to be on screen
+    def see(self, index: int):
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self.visible_rows:
+            self.scroll_to(index - self.visible_rows + 1)
+        else:
+            self.render()
+
+    def highlight(self, index: int):
+        self.highlighted = index
+        self.see(index)
+
+    def render(self):
+        end = min(self.top + self.visible_rows, len(self))
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(self.line(index) for index in range(self.top, end)))
+        if self.top <= self.highlighted < end:
+            line_num = self.highlighted - self.top + 1
+            self.text.tag_add("highlight", f"{line_num}.0", f"{line_num}.end")
+        self.text.config(state=tk.DISABLED)
+
+        total = max(len(self), 1)
+        self.scrollbar.set(self.top / total, end / total if len(self) else 1)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self)))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.visible_rows)
+        else:
+            self.scroll_by(int(amount))
+
+    def on_wheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def on_resize(self, event):
+        self.visible_rows = max(event.height // self.line_height, 1)
+        self.scroll_to(self.top)